@@ -0,0 +1,103 @@
+"""
+Lookup throughput of DictKeysDict with FrozenDict keys.
+
+Compares the current FrozenDict against the previous implementation, which
+sorted the items and rebuilt a tuple on every ``__hash__`` call, both as plain
+dict keys and through DictKeysDict lookups.
+
+"reused" rows probe with equal key objects built once, outside the timed loop,
+so after the first pass the current FrozenDict only returns its cached hash.
+"built" rows construct the key from a plain dict on every lookup and so also
+pay for sorting the items and the first hash, like a caller that builds a key
+per lookup.
+
+    python benchmarks/bench_dictkey.py
+"""
+
+import timeit
+
+from zuu.common.dictKey import DictKeysDict
+from zuu.common.frozenDict import FrozenDict
+
+
+class LegacyFrozenDict(dict):
+    def __init__(self, *args, **kwargs):
+        super().__init__(tuple(sorted(dict(*args, **kwargs).items())))
+
+    def __hash__(self):
+        return hash(tuple(sorted(self.items())))
+
+
+class LegacyDictKeysDict(DictKeysDict):
+    """DictKeysDict storing LegacyFrozenDict keys as given, without interning."""
+
+    def _ensure_frozendict(self, key):
+        if isinstance(key, LegacyFrozenDict):
+            return key
+        return super()._ensure_frozendict(key)
+
+
+def _fields(n, width):
+    return [{f"field{j}": (i * 31 + j) % 97 for j in range(width)} for i in range(n)]
+
+
+def _keys(cls, n, width):
+    return [cls(fields) for fields in _fields(n, width)]
+
+
+def _time(table, make, n, width, repeat, number, build):
+    if build:
+        probes = _fields(n, width)
+
+        def lookup():
+            for fields in probes:
+                table[make(fields)]
+
+    else:
+        # equal but distinct key objects, reused by every pass
+        probes = _keys(make, n, width)
+
+        def lookup():
+            for k in probes:
+                table[k]
+
+    best = min(timeit.repeat(lookup, repeat=repeat, number=number))
+    return n * number / best
+
+
+def bench(cls, n=1000, width=4, repeat=5, number=20, build=False):
+    table = dict.fromkeys(_keys(cls, n, width), 0)
+    return _time(table, cls, n, width, repeat, number, build)
+
+
+def bench_dictkeysdict(
+    n=1000, width=4, repeat=5, number=20, legacy=False, interned=False, build=False
+):
+    if legacy:
+        table = LegacyDictKeysDict({k: 0 for k in _keys(LegacyFrozenDict, n, width)})
+        make = LegacyFrozenDict
+    else:
+        table = DictKeysDict({k: 0 for k in _keys(FrozenDict, n, width)})
+        make = FrozenDict.intern if interned else FrozenDict
+    return _time(table, make, n, width, repeat, number, build)
+
+
+if __name__ == "__main__":
+    for build in (False, True):
+        probes = "built" if build else "reused"
+        for width in (1, 4, 16):
+            before = bench(LegacyFrozenDict, width=width, build=build)
+            after = bench(FrozenDict, width=width, build=build)
+            print(
+                f"dict         {probes:<6} width={width:<3} legacy {before:>12,.0f} lookups/s   "
+                f"current {after:>12,.0f} lookups/s   x{after / before:.1f}"
+            )
+        for width in (1, 4, 16):
+            before = bench_dictkeysdict(width=width, legacy=True, build=build)
+            after = bench_dictkeysdict(width=width, build=build)
+            interned = bench_dictkeysdict(width=width, interned=True, build=build)
+            print(
+                f"DictKeysDict {probes:<6} width={width:<3} legacy {before:>12,.0f} lookups/s   "
+                f"current {after:>12,.0f} lookups/s   x{after / before:.1f}   "
+                f"interned {interned:>12,.0f} lookups/s   x{interned / before:.1f}"
+            )
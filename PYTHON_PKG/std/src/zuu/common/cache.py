@@ -0,0 +1,294 @@
+import functools
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import typing
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+__all__ = ["DiskCache", "disk_memo", "DEFAULT_CACHE_PATH"]
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".zwtil", "cache", "memo.sqlite3")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+_MISSING = object()
+
+_SCHEMA = """
+BEGIN IMMEDIATE;
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires REAL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+-- running total of entries.size, kept by the triggers so a set never sums the whole table
+CREATE TABLE IF NOT EXISTS totals (id INTEGER PRIMARY KEY CHECK (id = 0), bytes INTEGER NOT NULL);
+INSERT OR IGNORE INTO totals (id, bytes) SELECT 0, COALESCE(SUM(size), 0) FROM entries;
+CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN
+    UPDATE totals SET bytes = bytes + NEW.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN
+    UPDATE totals SET bytes = bytes - OLD.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS entries_update AFTER UPDATE OF size ON entries BEGIN
+    UPDATE totals SET bytes = bytes - OLD.size + NEW.size WHERE id = 0;
+END;
+COMMIT;
+"""
+
+# an upsert rather than INSERT OR REPLACE, whose implicit delete would not fire the delete trigger
+_UPSERT = """
+INSERT INTO entries (key, value, size, expires, accessed) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (key) DO UPDATE SET
+    value = excluded.value, size = excluded.size, expires = excluded.expires, accessed = excluded.accessed
+"""
+
+
+def _dumps(value, serializer: str) -> bytes:
+    if serializer == "orjson":
+        return orjson.dumps(value)
+    return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _loads(data: bytes, serializer: str):
+    if serializer == "orjson":
+        return orjson.loads(data)
+    return pickle.loads(data)
+
+
+class DiskCache:
+    """
+    A persistent key/value store on SQLite with expiry, a size cap and LRU eviction.
+
+    Args:
+        path (str, optional): The database file. Defaults to `DEFAULT_CACHE_PATH`.
+        max_bytes (int, optional): Cap on the total size of stored values. The least recently
+            read entries are evicted past it. Defaults to 256 MiB.
+        serializer (str, optional): "pickle" (default) or "orjson"; orjson is faster but only
+            handles JSON values, and needs the `io` extra.
+
+    The database runs in WAL mode with a busy timeout, so several processes can share one file.
+    Each thread gets its own connection, and connections are reopened after a fork.
+    """
+
+    def __init__(
+        self,
+        path: str = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        serializer: str = "pickle",
+    ):
+        if serializer not in ("pickle", "orjson"):
+            raise ValueError(f"unknown serializer {serializer!r}")
+        if serializer == "orjson" and orjson is None:
+            raise ImportError("orjson is required for serializer='orjson'")
+        self.path = path or DEFAULT_CACHE_PATH
+        self.max_bytes = max_bytes
+        self.serializer = serializer
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key: str, default=None):
+        """
+        Returns the stored value, or `default` when it is missing or expired.
+        """
+        conn = self._connection()
+        now = time.time()
+        row = conn.execute(
+            "SELECT value, expires FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or (row[1] is not None and row[1] <= now):
+            self.misses += 1
+            return default
+        try:
+            value = _loads(row[0], self.serializer)
+        except Exception:
+            # e.g. the pickled class was renamed or removed, the row can never be read again
+            self.delete(key)
+            self.misses += 1
+            return default
+        conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value, ttl: float = None):
+        """
+        Stores a value, expiring after `ttl` seconds when given. Values larger than `max_bytes` are not stored.
+        """
+        self._put(key, _dumps(value, self.serializer), ttl)
+
+    def _put(self, key: str, data: bytes, ttl: float = None):
+        if len(data) > self.max_bytes:
+            return
+        now = time.time()
+        expires = now + ttl if ttl is not None else None
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(_UPSERT, (key, data, len(data), expires, now))
+            if self._total(conn) > self.max_bytes:
+                self._evict(conn, now)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _total(conn: sqlite3.Connection) -> int:
+        return conn.execute("SELECT bytes FROM totals WHERE id = 0").fetchone()[0]
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        # only runs over the cap: expired entries go first, then the least recently read
+        conn.execute("DELETE FROM entries WHERE expires IS NOT NULL AND expires <= ?", (now,))
+        total = self._total(conn)
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed"):
+            victims.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+
+    def delete(self, key: str):
+        self._connection().execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def clear(self, prefix: str = None):
+        """
+        Removes every entry, or only the keys starting with `prefix`.
+        """
+        conn = self._connection()
+        if prefix is None:
+            conn.execute("DELETE FROM entries")
+        else:
+            conn.execute(
+                "DELETE FROM entries WHERE substr(key, 1, ?) = ?", (len(prefix), prefix)
+            )
+
+    def stats(self) -> dict:
+        conn = self._connection()
+        count = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        size = self._total(conn)
+        return {
+            "entries": count,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+_SCALARS = (str, bytes, int, float, complex, bool, type(None))
+
+
+def _canonical(value):
+    """
+    A form of `value` whose repr is the same in every process. Pickling sets directly would
+    not be, their order follows string hashing and so changes with PYTHONHASHSEED.
+    """
+    if isinstance(value, _SCALARS):
+        return value
+    name = type(value).__qualname__
+    if isinstance(value, (list, tuple)):
+        return (name, tuple(_canonical(v) for v in value))
+    if isinstance(value, dict):
+        items = [(_canonical(k), _canonical(v)) for k, v in value.items()]
+        return (name, tuple(sorted(items, key=repr)))
+    if isinstance(value, (set, frozenset)):
+        return (name, tuple(sorted((_canonical(v) for v in value), key=repr)))
+    return (name, pickle.dumps(value, protocol=4))
+
+
+def _memo_key(args: tuple, kwargs: dict) -> str:
+    return hashlib.sha256(repr(_canonical((args, kwargs))).encode("utf-8")).hexdigest()
+
+
+_default_caches: typing.Dict[tuple, DiskCache] = {}
+_default_lock = threading.Lock()
+
+
+def _shared_cache(path: str, max_bytes: int, serializer: str) -> DiskCache:
+    key = (path or DEFAULT_CACHE_PATH, max_bytes, serializer)
+    with _default_lock:
+        cache = _default_caches.get(key)
+        if cache is None:
+            cache = _default_caches[key] = DiskCache(path, max_bytes, serializer)
+        return cache
+
+
+def disk_memo(
+    ttl: float = None,
+    path: str = None,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    serializer: str = "pickle",
+    cache: DiskCache = None,
+):
+    """
+    Memoizes a function's results in a `DiskCache`, so they survive process restarts.
+
+    Args:
+        ttl (float, optional): Seconds a result stays valid, None to keep it until evicted.
+        path (str, optional): The database file, see `DiskCache`.
+        max_bytes (int, optional): Size cap of the database, see `DiskCache`.
+        serializer (str, optional): "pickle" or "orjson", see `DiskCache`.
+        cache (DiskCache, optional): Use this cache instead of one built from the arguments above.
+
+    The key is the function's module and qualified name plus a SHA-256 of a canonical encoding
+    of the arguments (dict items and set members sorted), so it is stable across processes.
+    Arguments other than builtin scalars and containers must be picklable. `None` results are cached too,
+    results the serializer cannot handle are returned without being cached. The wrapper has
+    `cache_clear()` (this function's entries only) and `cache` attributes.
+
+    Example:
+        ```python
+        from zuu.pkg.subprocess import query_json
+        cached_query_json = disk_memo(ttl=3600)(query_json)
+        ```
+    """
+
+    def decorator(func):
+        store = cache or _shared_cache(path, max_bytes, serializer)
+        prefix = f"{func.__module__}.{func.__qualname__}:"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = prefix + _memo_key(args, kwargs)
+            value = store.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+            value = func(*args, **kwargs)
+            try:
+                data = _dumps(value, store.serializer)
+            except Exception:
+                # the call succeeded, a result the serializer cannot handle is just not cached
+                return value
+            store._put(key, data, ttl)
+            return value
+
+        wrapper.cache = store
+        wrapper.cache_clear = lambda: store.clear(prefix)
+        return wrapper
+
+    return decorator
@@ -1,6 +1,32 @@
+from functools import lru_cache
 from typing import Any, Union
 from .frozenDict import FrozenDict
 import json
+import re
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+KEY_CACHE_SIZE = 4096
+
+# a number that may not fit in 64 bits, see DictKeysDict._decode
+_LONG_DIGITS = re.compile(r"\d{19}")
+_LONG_DIGITS_BYTES = re.compile(rb"\d{19}")
+
+
+@lru_cache(maxsize=KEY_CACHE_SIZE)
+def _parse_key(string: str) -> FrozenDict:
+    """
+    Parses a raw string key into its canonical FrozenDict, memoized so that
+    repeated lookups with the same string skip `json.loads`.
+    """
+    return FrozenDict.from_string(string)
+
+
+def _restore(cls, indexed: bool) -> "DictKeysDict":
+    return cls(_indexed=indexed)
 
 
 class DictKeysDict(dict):
@@ -8,32 +34,167 @@ class DictKeysDict(dict):
     A dictionary where all keys are enforced to be FrozenDict instances. Any dictionary
     values are converted recursively to DictKeysDict, ensuring that all nested keys within
     these dictionary values are also FrozenDict instances.
+
+    With `_indexed=True` the dictionary also keeps an inverted index from each
+    (field, value) pair to the keys containing it, which `query` and `query_keys`
+    use to answer partial key matches without scanning every entry.
     """
 
-    def __init__(self, *args: Any, **kwargs: Any) -> None:
+    _index: dict = None
+
+    def __init__(self, *args: Any, _indexed: bool = False, **kwargs: Any) -> None:
         super().__init__()
+        self._index = {} if _indexed else None
         self.update(*args, **kwargs)
 
     def __getitem__(self, key: Union[str, FrozenDict]) -> Any:
         if isinstance(key, str):
-            key = FrozenDict.from_string(key)
+            key = _parse_key(key)
         return super().__getitem__(key)
 
     def __setitem__(self, key: Union[str, dict, FrozenDict], value: Any) -> None:
         key = self._ensure_frozendict(key)
         value = self._convert_value(value)
         super().__setitem__(key, value)
+        self._index_add(key)
+
+    def __delitem__(self, key: Union[str, FrozenDict]) -> None:
+        if isinstance(key, str):
+            key = _parse_key(key)
+        super().__delitem__(key)
+        self._index_discard(key)
 
     def update(self, *args: Any, **kwargs: Any) -> None:
         for k, v in dict(*args, **kwargs).items():
             k = self._ensure_frozendict(k)
             v = self._convert_value(v)
             super().__setitem__(k, v)
+            self._index_add(k)
 
     def setdefault(self, key: Union[str, dict, FrozenDict], default: Any = None) -> Any:
         key = self._ensure_frozendict(key)
         default = self._convert_value(default)
-        return super().setdefault(key, default)
+        value = super().setdefault(key, default)
+        self._index_add(key)
+        return value
+
+    def pop(self, key: Union[str, FrozenDict], *default: Any) -> Any:
+        if isinstance(key, str):
+            key = _parse_key(key)
+        if key not in self:
+            return super().pop(key, *default)
+        value = super().pop(key)
+        self._index_discard(key)
+        return value
+
+    def popitem(self) -> tuple:
+        key, value = super().popitem()
+        self._index_discard(key)
+        return key, value
+
+    def clear(self) -> None:
+        super().clear()
+        if self._index is not None:
+            self._index.clear()
+
+    def __ior__(self, other: Any) -> "DictKeysDict":
+        self.update(other)
+        return self
+
+    def __or__(self, other: Any) -> "DictKeysDict":
+        if not isinstance(other, dict):
+            return NotImplemented
+        new = self.copy()
+        new.update(other)
+        return new
+
+    def copy(self) -> "DictKeysDict":
+        """
+        A shallow copy with its own index, so changing one dictionary never affects the other's queries.
+        """
+        new = type(self)(_indexed=self._index is not None)
+        dict.update(new, self)
+        if self._index is not None:
+            new._index = {item: set(keys) for item, keys in self._index.items()}
+        return new
+
+    def __copy__(self) -> "DictKeysDict":
+        return self.copy()
+
+    def __reduce__(self):
+        # the items are restored through __setitem__, which rebuilds the index instead of
+        # pickling it or sharing it with a copy
+        state = {k: v for k, v in vars(self).items() if k != "_index"} or None
+        return _restore, (type(self), self._index is not None), state, None, iter(dict.items(self))
+
+    def _index_add(self, key: FrozenDict) -> None:
+        if self._index is None:
+            return
+        for item in key.items():
+            posting = self._index.get(item)
+            if posting is None:
+                self._index[item] = {key}
+            else:
+                posting.add(key)
+
+    def _index_discard(self, key: FrozenDict) -> None:
+        if self._index is None:
+            return
+        for item in key.items():
+            posting = self._index.get(item)
+            if posting is not None:
+                posting.discard(key)
+                if not posting:
+                    del self._index[item]
+
+    def query_keys(self, partial: dict = None, **fields: Any) -> set:
+        """
+        Finds all keys that contain every given field with the given value.
+
+        Args:
+            partial (dict, optional): The fields to match, e.g. {"region": "eu"}.
+            **fields: Additional fields to match.
+
+        Returns:
+            set: The matching FrozenDict keys.
+
+        When the dictionary is indexed, the posting sets of the requested pairs are
+        intersected smallest first, so the cost follows the size of the smallest
+        posting rather than the size of the dictionary. Otherwise every key is checked.
+        """
+        wanted = {**(partial or {}), **fields}
+        if not wanted:
+            return set(self.keys())
+
+        if self._index is None:
+            return {
+                key
+                for key in self.keys()
+                if all(f in key and key[f] == v for f, v in wanted.items())
+            }
+
+        postings = []
+        for item in wanted.items():
+            posting = self._index.get(item)
+            if not posting:
+                return set()
+            postings.append(posting)
+        postings.sort(key=len)
+
+        result = set(postings[0])
+        for posting in postings[1:]:
+            result &= posting
+            if not result:
+                break
+        return result
+
+    def query(self, partial: dict = None, **fields: Any) -> dict:
+        """
+        Returns the entries whose key contains every given field with the given value.
+
+        Takes the same arguments as `query_keys`.
+        """
+        return {key: dict.__getitem__(self, key) for key in self.query_keys(partial, **fields)}
 
     def _ensure_frozendict(
         self, key: Union[str, dict]
@@ -51,14 +212,14 @@ class DictKeysDict(dict):
             KeyError: If the key is not a valid FrozenDict or a convertible string.
         """
         if isinstance(key, str):
-            return FrozenDict.from_string(key)
+            return _parse_key(key)
         elif isinstance(key, dict) and not isinstance(key, FrozenDict):
             return DictKeysDict(key)  # Convert nested dicts on keys to DictKeysDict
         elif not isinstance(key, FrozenDict):
             raise KeyError(
                 f"Invalid key type: {type(key)}. Keys must be instances of FrozenDict or convertible strings."
             )
-        return key
+        return FrozenDict.intern(key)
 
     def _convert_value(self, value: Any) -> Any:
         """
@@ -76,6 +237,107 @@ class DictKeysDict(dict):
             return [self._convert_value(item) for item in value]
         return value
 
+    @staticmethod
+    def key_cache_info() -> dict:
+        """
+        Returns statistics of the shared string key cache.
+
+        Returns:
+            dict: hits, misses, maxsize, currsize and hit_rate (0.0 when unused).
+        """
+        info = _parse_key.cache_info()
+        total = info.hits + info.misses
+        return {
+            "hits": info.hits,
+            "misses": info.misses,
+            "maxsize": info.maxsize,
+            "currsize": info.currsize,
+            "hit_rate": info.hits / total if total else 0.0,
+        }
+
+    @staticmethod
+    def key_cache_clear() -> None:
+        """
+        Empties the shared string key cache and resets its statistics.
+        """
+        _parse_key.cache_clear()
+
+    @classmethod
+    def _to_jsonable(cls, obj: Any) -> Any:
+        """
+        Converts an object into plain JSON-ready containers in a single iterative pass.
+
+        DictKeysDict keys and FrozenDict values are turned into strings with
+        `FrozenDict.toString()`, lists are rebuilt and anything else is kept as is.
+        """
+        toString = FrozenDict.toString
+        holder = [obj]
+        stack = [(holder, 0, obj)]
+        while stack:
+            parent, slot, x = stack.pop()
+            if isinstance(x, FrozenDict):
+                parent[slot] = toString(x)
+            elif isinstance(x, dict):
+                out = {}
+                parent[slot] = out
+                for k, v in x.items():
+                    if isinstance(k, FrozenDict):
+                        k = toString(k)
+                    out[k] = v
+                    if isinstance(v, (dict, list)):
+                        stack.append((out, k, v))
+            elif isinstance(x, list):
+                out = list(x)
+                parent[slot] = out
+                for i, v in enumerate(out):
+                    if isinstance(v, (dict, list)):
+                        stack.append((out, i, v))
+        return holder[0]
+
+    @classmethod
+    def _from_jsonable(cls, obj: Any) -> Any:
+        """
+        Converts freshly loaded JSON data into DictKeysDict instances in a single iterative pass.
+
+        Lists are converted in place and every value is visited exactly once, bypassing the
+        per-item `_convert_value` that the constructor would run.
+        """
+        holder = [obj]
+        stack = [(holder, 0, obj)]
+        setitem = dict.__setitem__
+        while stack:
+            parent, slot, x = stack.pop()
+            if isinstance(x, dict):
+                out = cls()
+                parent[slot] = out
+                for k, v in x.items():
+                    k = _parse_key(k)
+                    setitem(out, k, v)
+                    if isinstance(v, (dict, list)):
+                        stack.append((out, k, v))
+            elif isinstance(x, list):
+                for i, v in enumerate(x):
+                    if isinstance(v, (dict, list)):
+                        stack.append((x, i, v))
+        return holder[0]
+
+    @staticmethod
+    def _decode(data: Union[str, bytes]) -> Any:
+        """
+        Parses JSON with orjson where that is lossless, otherwise with `json.loads`.
+
+        orjson rejects NaN and Infinity, which `json.dumps` writes, and silently turns integers
+        outside the 64-bit range into floats; any run of 19 digits sends the text to `json`.
+        """
+        if orjson is not None:
+            pattern = _LONG_DIGITS_BYTES if isinstance(data, (bytes, bytearray)) else _LONG_DIGITS
+            if pattern.search(data) is None:
+                try:
+                    return orjson.loads(data)
+                except orjson.JSONDecodeError:
+                    pass
+        return json.loads(data)
+
     @classmethod
     def dumpJson(cls, obj: Any) -> str:
         """
@@ -87,34 +349,33 @@ class DictKeysDict(dict):
         Returns:
             str: The serialized JSON string.
 
-        This class method recursively converts the object to a JSON-serializable format. If the object is a `DictKeysDict`, it converts the keys to strings using `FrozenDict.toString()`. If the object is a list, it recursively converts each item in the list. If the object is a `FrozenDict`, it converts it to a string using `FrozenDict.toString()`. For any other object, it returns the object as is. The resulting object is then serialized using `json.dumps()`.
+        The object is converted to a JSON-serializable form in one pass: keys of a `DictKeysDict` and
+        `FrozenDict` values are turned into strings with `FrozenDict.toString()` and lists are walked
+        item by item. The result is encoded with `json.dumps()`, so the text is the same whether or not
+        orjson is installed, and NaN, Infinity and big integers are kept.
 
         Example:
-            >>> class DictKeysDict(dict):
-            ...     pass
-            >>> class FrozenDict(dict):
-            ...     @classmethod
-            ...     def toString(cls, key):
-            ...         return str(key)
-            >>> obj = DictKeysDict({FrozenDict({'a': 1}): [FrozenDict({'b': 2}), {'c': 3}]})
-            >>> DictKeysDict.dumpJson(obj)
-            '{"{a: 1}": ["{b: 2}", {"c": 3}]}'
-        """
-
-        def parse(x: Any) -> Any:
-            if isinstance(x, cls):
-                return {FrozenDict.toString(k): parse(v) for k, v in x.items()}
-            elif isinstance(x, list):
-                return [parse(item) for item in x]
-            elif isinstance(x, FrozenDict):
-                return FrozenDict.toString(x)  # Special handling for simple FrozenDict
-            else:
-                return x
+            >>> obj = DictKeysDict({FrozenDict({'a': 1}): [{'b': 2}, 'c']})
+            >>> DictKeysDict.loadJson(DictKeysDict.dumpJson(obj)) == obj
+            True
+        """
+        return json.dumps(cls._to_jsonable(obj))
+
+    @classmethod
+    def dumpJsonFile(cls, obj: Any, path: str) -> None:
+        """
+        Serializes an object like `dumpJson` and writes it straight to a file.
 
-        return json.dumps(parse(obj))
+        Args:
+            obj (Any): The object to be serialized.
+            path (str): The file to write.
+        """
+        data = cls._to_jsonable(obj)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
 
     @classmethod
-    def loadJson(cls, jsonStr: str) -> "DictKeysDict":
+    def loadJson(cls, jsonStr: Union[str, bytes]) -> "DictKeysDict":
         """
         A method to load JSON from a string, recursively converting nested objects into DictKeysDict.
         Args:
@@ -123,15 +384,15 @@ class DictKeysDict(dict):
         Returns:
             The loaded JSON object represented as a DictKeysDict.
         """
+        return cls._from_jsonable(cls._decode(jsonStr))
 
-        def convert(obj: Any) -> Any:
-            if isinstance(obj, dict):
-                return DictKeysDict(
-                    {FrozenDict.from_string(k): convert(v) for k, v in obj.items()}
-                )
-            elif isinstance(obj, list):
-                return [convert(item) for item in obj]
-            else:
-                return obj
+    @classmethod
+    def loadJsonFile(cls, path: str) -> "DictKeysDict":
+        """
+        Loads a JSON file written by `dumpJsonFile` (or any JSON file) into DictKeysDict instances.
 
-        return convert(json.loads(jsonStr))
+        Args:
+            path (str): The file to read.
+        """
+        with open(path, "rb") as f:
+            return cls._from_jsonable(cls._decode(f.read()))
@@ -1,9 +1,106 @@
-from hashlib import md5
+from collections import OrderedDict
+from concurrent.futures import Executor
+import hashlib
+import json
 import os
+import threading
 import typing
-from ..pkg.hashlib import sha256
+from ..pkg import inotify
+from ..pkg.hashlib import hash_file
 from ..io import load as read
 
+# watcher name -> index in the (size, mtime_ns, inode) stat signature
+_STAT_WATCHERS = {"size": 0, "mdate": 1}
+# watcher name -> digest algorithm
+_HASH_WATCHERS = {"hash": "sha256", "sha256": "sha256", "md5": "md5", "crc32": "crc32"}
+
+
+_MISSING = object()
+
+# extensions whose lines are parsed as JSON in append-only mode
+_JSON_RECORD_EXTENSIONS = ("jsonl", "ndjson")
+# bytes hashed at the start and at the end of the consumed prefix in append-only mode
+_APPEND_CHECK_BYTES = 4096
+
+
+class ContentCache:
+    """
+    An LRU cache for loaded file contents, bounded by approximate size in bytes and/or number of entries.
+
+    The size of an entry is the size of the file it was loaded from. When a new entry pushes the cache
+    over budget, the least recently used entries are evicted; the entry just added is always kept. An
+    evicted file is simply loaded again on its next access.
+    """
+
+    def __init__(self, max_bytes: int = None, max_entries: int = None):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.bytes = 0
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, path) -> bool:
+        return path in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, path: str, default=None):
+        with self._lock:
+            entry = self._data.get(path)
+            if entry is None:
+                return default
+            self._data.move_to_end(path)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, path: str, content, size: int = 0):
+        with self._lock:
+            old = self._data.pop(path, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._data[path] = (content, size)
+            self.bytes += size
+            self.loads += 1
+
+            while len(self._data) > 1 and (
+                (self.max_bytes is not None and self.bytes > self.max_bytes)
+                or (self.max_entries is not None and len(self._data) > self.max_entries)
+            ):
+                _, (_, evicted_size) = self._data.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+
+    def pop(self, path: str, default=None):
+        with self._lock:
+            entry = self._data.pop(path, None)
+            if entry is None:
+                return default
+            self.bytes -= entry[1]
+            return entry[0]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        """
+        Returns the entry count, byte total, budgets and the hit/load/eviction counters.
+        """
+        return {
+            "entries": len(self._data),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "loads": self.loads,
+            "evictions": self.evictions,
+        }
+
 
 class FileProperty:
     """
@@ -12,9 +109,21 @@ class FileProperty:
     The `FileProperty` class provides a way to track changes to a file and optionally execute callbacks when changes are detected. It supports several built-in file property checks, as well as the ability to provide custom load and save methods.
 
     The class initializes with a file path, a list of properties to watch (e.g. "size", "mdate", "sha256", "md5"), and optional callback functions. The `__get__` method is used to retrieve the file content, automatically updating the content if any of the watched properties have changed.
+
+    Polling is tiered: every check takes a single `os.stat` and compares (size, mtime_ns, inode) with the previous one. Content hashes ("sha256", "md5" or the fast non-cryptographic "crc32") are only computed when that signature changed, so a touched but unchanged file is not reloaded.
+
+    With `notify=True` on Linux, changes are reported by a shared inotify watcher thread instead, so an access to an unchanged file only compares a change counter. Where inotify is not available, or the watch cannot be added, the watched properties are polled as usual.
+
+    With `appendOnly=True` the content is a list of records, one per complete line (parsed as JSON for .jsonl/.ndjson files, decoded text otherwise). When the file grew and the same inode still starts with the prefix read before (checked by hashing a few KiB at its start and end), only the new tail is read and its records are appended to the cached list in place. Rotated, truncated or rewritten files are read again from the start.
+
+    Callbacks run on the first load and when a change was detected, not on every access or when an entry evicted from the cache is read again. By default they run on the reading thread; with `callbackExecutor` they are submitted to that executor instead, and with `debounce` (seconds) a burst of changes is coalesced into one notification carrying the latest content, sent when the window after the first change ends.
+
+    Loaded contents are kept in a `ContentCache`. By default all instances share the class-level cache, limited to `DEFAULT_CACHE_BYTES`; pass `cache=ContentCache(...)` to give an instance its own budget, or use `FileProperty.configure_cache` to change the shared one.
     """
 
-    _content: dict = {}
+    DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+
+    _content: ContentCache = ContentCache(max_bytes=DEFAULT_CACHE_BYTES)
     _meta: dict = {}
 
     def __init__(
@@ -27,6 +136,11 @@ class FileProperty:
         callbacks: typing.List[typing.Callable] = [],
         loadMethod: typing.Callable = None,
         saveMethod: typing.Callable = None,
+        notify: bool = False,
+        cache: ContentCache = None,
+        appendOnly: bool = False,
+        callbackExecutor: Executor = None,
+        debounce: float = 0,
     ):
         self.customWatcher = None
         self.filepath = filepath
@@ -40,83 +154,105 @@ class FileProperty:
         elif isinstance(watcher, typing.Callable):
             self.customWatcher = watcher
 
+        if self.customWatcher is None:
+            unknown = [
+                w for w in self.watcher if w not in _STAT_WATCHERS and w not in _HASH_WATCHERS
+            ]
+            if unknown:
+                raise ValueError(f"Unknown watchers: {unknown}")
+            self._statFields = [
+                _STAT_WATCHERS[w] for w in self.watcher if w in _STAT_WATCHERS
+            ]
+            self._hashAlgorithms = sorted(
+                {_HASH_WATCHERS[w] for w in self.watcher if w in _HASH_WATCHERS}
+            )
+
+        if appendOnly and loadMethod is not None:
+            raise ValueError("appendOnly parses records itself and cannot use a loadMethod")
+        self.appendOnly = appendOnly
+        self._jsonRecords = self.filepath.rsplit(".", 1)[-1].lower() in _JSON_RECORD_EXTENSIONS
+
         self.customLoad = loadMethod
         self.customSave = saveMethod
         self.callbacks = callbacks
+        self.callbackExecutor = callbackExecutor
+        self.debounce = debounce
+        self._pending = _MISSING
+        self._pendingLock = threading.Lock()
+        if cache is not None:
+            self._content = cache
+
+        self._meta[self.filepath] = {}
+
+        self._notifier = None
+        # the watcher's change counter when this instance last loaded the file
+        self._loadedAt = None
+        self._loaded = False
+        if notify and inotify.is_supported():
+            notifier = inotify.InotifyWatcher()
+            if notifier.watch(self.filepath):
+                self._notifier = notifier
+
+    @classmethod
+    def configure_cache(cls, max_bytes: int = None, max_entries: int = None) -> ContentCache:
+        """
+        Replaces the shared content cache with a new one using the given budgets.
 
-        self._meta[filepath] = {}
+        Args:
+            max_bytes (int, optional): Approximate byte budget. None means unbounded.
+            max_entries (int, optional): Maximum number of cached files. None means unbounded.
+
+        Returns:
+            ContentCache: The new shared cache.
+        """
+        FileProperty._content = ContentCache(max_bytes=max_bytes, max_entries=max_entries)
+        return FileProperty._content
+
+    def _needsReload(self):
+        """
+        Returns (reload, changed): whether the content has to be read, and whether that is because
+        the file changed rather than only because its cache entry was evicted.
+        """
+        if self._notifier is not None:
+            count = self._notifier.changes.get(self.filepath)
+            if count is not None:
+                if count != self._loadedAt:
+                    # taken before reading, so a write during the read is seen next time
+                    self._loadedAt = count
+                    return True, True
+                return self.filepath not in self._content, False
+
+        # also run for a missing entry, it records the baseline before the first read
+        changed = self._contentChanged()
+        return changed or self.filepath not in self._content, changed
 
     def _contentChanged(self):
         if self.customWatcher is not None:
             return self.customWatcher(self.filepath)
 
-        for w in self.watcher:
-            match w:
-                case "size":
-                    res = self._check_size()
-                case "mdate":
-                    res = self._check_mdate()
-                case "hash" | "sha256":
-                    res = self._check_sha256()
-                case "md5":
-                    res = self._check_md5()
-
-            if res:
-                return True
-
-        return False
-
-    def _check_size(self):
-        meta: dict = self._meta[self.filepath]
-        newsize = os.path.getsize(self.filepath)
-        if "size" not in meta:
-            meta["size"] = newsize
-            return True
-
-        if meta["size"] != newsize:
-            meta["size"] = newsize
-            return True
-
-        return False
-
-    def _check_mdate(self):
-        meta: dict = self._meta[self.filepath]
-        newmdate = os.path.getmtime(self.filepath)
-        if "mdate" not in meta:
-            meta["mdate"] = newmdate
-            return True
-
-        if meta["mdate"] != newmdate:
-            meta["mdate"] = newmdate
-            return True
-
-        return False
-
-    def _check_sha256(self):
-        meta: dict = self._meta[self.filepath]
-        newsha256 = sha256(self.filepath)
-        if "sha256" not in meta:
-            meta["sha256"] = newsha256
-            return True
-
-        if meta["sha256"] != newsha256:
-            meta["sha256"] = newsha256
-            return True
-
-        return False
-
-    def _check_md5(self):
-        meta: dict = self._meta[self.filepath]
-        newmd5 = md5(self.filepath)
-        if "md5" not in meta:
-            meta["md5"] = newmd5
-            return True
-
-        if meta["md5"] != newmd5:
-            meta["md5"] = newmd5
-            return True
-
-        return False
+        meta: dict = self._meta.setdefault(self.filepath, {})
+        st = os.stat(self.filepath)
+        signature = (st.st_size, st.st_mtime_ns, st.st_ino)
+        previous = meta.get("stat")
+        if previous == signature:
+            return False
+        meta["stat"] = signature
+
+        if previous is not None and not any(
+            previous[i] != signature[i] for i in self._statFields
+        ):
+            if not self._hashAlgorithms:
+                return False
+            digests = hash_file(self.filepath, self._hashAlgorithms)
+            changed = digests != meta.get("digests")
+            meta["digests"] = digests
+            return changed
+
+        # first look or a watched stat field changed: the content is (re)loaded, and the
+        # digests are recorded as the baseline for the next touch
+        if self._hashAlgorithms:
+            meta["digests"] = hash_file(self.filepath, self._hashAlgorithms)
+        return True
 
     def __get__(self, instance, owner):
         self.filepath = (
@@ -125,14 +261,106 @@ class FileProperty:
             else self.filepath
         )
 
-        if self.filepath not in self._content or self._contentChanged():
-            self._content[self.filepath] = (
-                read(self.filepath)
-                if self.customLoad is None
-                else self.customLoad(self.filepath)
-            )
+        content = _MISSING
+        reload, changed = self._needsReload()
+        if not reload:
+            content = self._content.get(self.filepath, _MISSING)
 
+        if content is _MISSING:
+            if self.appendOnly:
+                content = self._loadRecords(self._content.pop(self.filepath))
+            elif self.customLoad is None:
+                content = read(self.filepath)
+            else:
+                content = self.customLoad(self.filepath)
+            self._content.put(self.filepath, content, self._approxSize())
+            # an evicted entry read again is not a change
+            if self.callbacks and (changed or not self._loaded):
+                self._notifyChange(content)
+            self._loaded = True
+
+        return content
+
+    def _runCallbacks(self, content):
         for callback in self.callbacks:
-            callback(self.filepath, self._content[self.filepath])
+            callback(self.filepath, content)
+
+    def _dispatch(self, content):
+        if self.callbackExecutor is None:
+            self._runCallbacks(content)
+        else:
+            self.callbackExecutor.submit(self._runCallbacks, content)
+
+    def _notifyChange(self, content):
+        if self.debounce <= 0:
+            self._dispatch(content)
+            return
+
+        with self._pendingLock:
+            first = self._pending is _MISSING
+            self._pending = content
+        if first:
+            timer = threading.Timer(self.debounce, self._flushPending)
+            timer.daemon = True
+            timer.start()
+
+    def _flushPending(self):
+        with self._pendingLock:
+            content, self._pending = self._pending, _MISSING
+        if content is not _MISSING:
+            self._dispatch(content)
+
+    @staticmethod
+    def _prefixDigest(f, end: int) -> str:
+        hasher = hashlib.sha256()
+        f.seek(0)
+        hasher.update(f.read(min(end, _APPEND_CHECK_BYTES)))
+        start = max(0, end - _APPEND_CHECK_BYTES)
+        f.seek(start)
+        hasher.update(f.read(end - start))
+        return hasher.hexdigest()
+
+    def _loadRecords(self, previous: typing.Optional[list]) -> list:
+        meta: dict = self._meta.setdefault(self.filepath, {})
+        state = meta.get("append")
+        with open(self.filepath, "rb") as f:
+            st = os.fstat(f.fileno())
+            if (
+                previous is not None
+                and state is not None
+                and state["inode"] == st.st_ino
+                and st.st_size >= state["offset"]
+                and self._prefixDigest(f, state["offset"]) == state["digest"]
+            ):
+                records, start = previous, state["offset"]
+            else:
+                records, start = [], 0
+
+            f.seek(start)
+            data = f.read()
+            # a trailing line without newline may still be being written
+            complete = data.rfind(b"\n") + 1
+            end = start + complete
+
+            for line in data[:complete].splitlines():
+                if self._jsonRecords:
+                    if line.strip():
+                        records.append(json.loads(line))
+                else:
+                    records.append(line.decode("utf-8", errors="replace"))
+
+            meta["append"] = {
+                "inode": st.st_ino,
+                "offset": end,
+                "digest": self._prefixDigest(f, end),
+            }
+        return records
 
-        return self._content[self.filepath]
+    def _approxSize(self) -> int:
+        signature = self._meta.get(self.filepath, {}).get("stat")
+        if signature is not None:
+            return signature[0]
+        try:
+            return os.path.getsize(self.filepath)
+        except OSError:
+            return 0
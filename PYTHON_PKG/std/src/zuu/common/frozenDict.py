@@ -1,5 +1,34 @@
 import json
 import copy
+import weakref
+
+
+def _canonical_items(args, kwargs) -> tuple:
+    if len(args) == 1 and not kwargs:
+        if isinstance(args[0], FrozenDict):
+            return args[0]._items
+        if isinstance(args[0], str):
+            return (("string", args[0]),)
+    return tuple(sorted(dict(*args, **kwargs).items()))
+
+
+def _typed(value):
+    # 1, True and 1.0 are equal and hash alike, the pool must still tell them apart
+    if isinstance(value, FrozenDict):
+        return (FrozenDict, _typed_items(value._items))
+    if isinstance(value, tuple):
+        return (type(value), tuple(_typed(v) for v in value))
+    if isinstance(value, frozenset):
+        return (type(value), frozenset(_typed(v) for v in value))
+    return (type(value), value)
+
+
+def _typed_items(items: tuple) -> tuple:
+    return tuple((_typed(k), _typed(v)) for k, v in items)
+
+
+def _frozen_method(self, *args, **kwargs):
+    raise NotImplementedError
 
 
 class FrozenDict(dict):
@@ -8,30 +37,83 @@ class FrozenDict(dict):
 
     This class is similar to the built-in `frozenset` data structure, but
     for dictionaries instead of sets.
+
+    The items are sorted once on creation and kept as a tuple, which is the
+    canonical form used for hashing. The hash itself is computed on first use
+    and cached, so repeated lookups of the same key cost a single attribute read.
+
+    Equal instances can be deduplicated through `FrozenDict.intern`, which keeps
+    a weak pool keyed by the canonical items and their types, so `{"a": 1}` and
+    `{"a": True}` stay distinct. Dict lookups compare keys by identity
+    before calling `__eq__`, so interned keys match without comparing items.
     """
 
-    def __init__(self, *args, **kwargs):
-        if len(args) == 1 and not kwargs and isinstance(args[0], str):
-            base = {"string": args[0]}
-        else:
-            base = sorted(dict(*args, **kwargs).items())
+    __slots__ = ("_items", "_hash", "_interned", "__weakref__")
+
+    _pool = weakref.WeakValueDictionary()
 
-        super().__init__(tuple(base))
+    def __init__(self, *args, **kwargs):
+        items = _canonical_items(args, kwargs)
+        super().__init__(items)
+        object.__setattr__(self, "_items", items)
+        object.__setattr__(self, "_hash", None)
+        object.__setattr__(self, "_interned", False)
 
     def __hash__(self):
-        return hash(tuple(sorted(self.items())))
+        h = self._hash
+        if h is None:
+            h = hash(self._items)
+            object.__setattr__(self, "_hash", h)
+        return h
+
+    @classmethod
+    def intern(cls, *args, **kwargs) -> "FrozenDict":
+        """
+        Returns the shared instance equal to the given mapping, creating and pooling it if needed.
+
+        Takes the same arguments as the constructor. The pool only holds weak references, so an
+        interned key is dropped once nothing else uses it. Mappings with unhashable values cannot
+        be pooled and are returned as a new, non-interned instance.
+        """
+        if (
+            len(args) == 1
+            and not kwargs
+            and type(args[0]) is cls
+            and args[0]._interned
+        ):
+            return args[0]
+
+        key = (cls, _typed_items(_canonical_items(args, kwargs)))
+        try:
+            pooled = cls._pool.get(key)
+        except TypeError:
+            return cls(*args, **kwargs)
+        if pooled is not None:
+            return pooled
+
+        obj = cls(*args, **kwargs)
+        pooled = cls._pool.setdefault(key, obj)
+        if pooled is obj:
+            object.__setattr__(obj, "_interned", True)
+        return pooled
 
     def __copy__(self):
-        return FrozenDict(self)
+        return self
 
     def __deepcopy__(self, memo):
         return FrozenDict(copy.deepcopy(dict(self), memo))
 
-    def __setitem__(self, key, value):
-        raise NotImplementedError
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
 
-    def __delitem__(self, key):
-        raise NotImplementedError
+    __setitem__ = _frozen_method
+    __delitem__ = _frozen_method
+    __ior__ = _frozen_method
+    clear = _frozen_method
+    pop = _frozen_method
+    popitem = _frozen_method
+    setdefault = _frozen_method
+    update = _frozen_method
 
     def __setattr__(self, key, value):
         raise AttributeError
@@ -48,13 +130,13 @@ class FrozenDict(dict):
     @classmethod
     def from_string(cls, string):
         if "{" not in string:
-            return cls({"string": string})
+            return cls.intern(string)
         try:
             resolved = json.loads(string)
         except json.decoder.JSONDecodeError as e:
             print(f"JSON decoding error: {e}")
             resolved = {"string": string}
-        return cls(resolved)
+        return cls.intern(resolved)
 
     def to_json(self):
         return json.dumps(dict(self))
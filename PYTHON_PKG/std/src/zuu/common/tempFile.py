@@ -1,57 +1,432 @@
+from concurrent.futures import Executor, ProcessPoolExecutor
+import contextlib
 import functools
+import importlib
+import subprocess
 import tempfile
+import threading
+import weakref
 import shutil
 import os
 import glob
+from ..pkg.os import CWD_LOCK
 
-def temp(paths=None, capture=None, chcwd : bool = True, err_copy_over : bool = True):
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+# linux/fs.h: _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+
+STAGE_MODES = ("copy", "reflink", "link")
+
+
+def _kernel_copy(src: str, dst: str, clone_only: bool) -> bool:
+    """
+    Clone `src` into a new file `dst` sharing extents (FICLONE). Unless `clone_only`, fall back
+    to an in-kernel `copy_file_range`, which is still a full copy on most filesystems.
+    Returns False, leaving no `dst` behind, when nothing worked. An existing `dst` is never
+    opened for writing, it may be a link to `src`.
+    """
+    if fcntl is None:
+        return False
+    try:
+        fdst = open(dst, "xb")
+    except OSError:
+        return False
+    try:
+        with open(src, "rb") as fsrc, fdst:
+            try:
+                fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+            except OSError:
+                if clone_only or not hasattr(os, "copy_file_range"):
+                    raise
+                remaining = os.fstat(fsrc.fileno()).st_size
+                while remaining > 0:
+                    n = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    if n == 0:
+                        break
+                    remaining -= n
+    except OSError:
+        try:
+            os.unlink(dst)
+        except OSError:
+            pass
+        return False
+    shutil.copystat(src, dst)
+    return True
+
+
+def _reflink(src: str, dst: str) -> bool:
+    """
+    A true copy-on-write clone only; False when the filesystem cannot share extents.
+    """
+    return _kernel_copy(src, dst, clone_only=True)
+
+
+def stage_file(src: str, dst_dir: str, mode: str = "copy") -> str:
+    """
+    Place a file into a directory using the cheapest method the mode allows.
+
+    Args:
+        src (str): The file to stage.
+        dst_dir (str): The target directory.
+        mode (str, optional): "copy" always copies. "reflink" clones copy-on-write where the
+            filesystem supports it and otherwise copies in the kernel (`copy_file_range`); the
+            staged file is independent either way. "link" tries a true reflink (FICLONE only),
+            then a hard link, then a symlink, then a copy; hard links and
+            symlinks share the input, so it must be treated as read-only. Defaults to "copy".
+
+    Returns:
+        str: The staged path.
+
+    Raises:
+        shutil.SameFileError: The target already is `src`, e.g. a link staged earlier.
+
+    A different file already at the target is replaced.
+    """
+    if mode not in STAGE_MODES:
+        raise ValueError(f"unknown stage mode {mode!r}, expected one of {STAGE_MODES}")
+    dst = os.path.join(dst_dir, os.path.basename(src))
+    if os.path.exists(dst) and os.path.samefile(src, dst):
+        raise shutil.SameFileError(f"{src!r} and {dst!r} are the same file")
+    if os.path.lexists(dst) and not os.path.isdir(dst):
+        # unlinked rather than written through, it may be a link to another input
+        os.unlink(dst)
+    if mode == "reflink":
+        if _kernel_copy(src, dst, clone_only=False):
+            return dst
+    elif mode == "link":
+        if _reflink(src, dst):
+            return dst
+        try:
+            os.link(src, dst)
+            return dst
+        except OSError:
+            pass
+        try:
+            os.symlink(os.path.abspath(src), dst)
+            return dst
+        except OSError:
+            pass
+    shutil.copy2(src, dst)
+    return dst
+
+
+def _capture_file(src: str, dst_dir: str, move: bool):
+    if move:
+        if os.path.islink(src):
+            # a symlink-staged input, moving it would replace the original with a link to itself
+            return
+        dst = os.path.join(dst_dir, os.path.basename(src))
+        try:
+            # a rename, when the temp directory shares the destination's filesystem
+            os.replace(src, dst)
+            return
+        except OSError:
+            pass
+    shutil.copy2(src, dst_dir)
+
+
+class Workspace:
+    """
+    A temporary working directory handed to functions wrapped with `temp(workspace=True)`.
+
+    The process working directory is never changed, so paths are resolved with `join` and
+    subprocesses are started with `cwd=` set to the workspace.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def __fspath__(self):
+        return self.path
+
+    def __str__(self):
+        return self.path
+
+    def __repr__(self):
+        return f"Workspace({self.path!r})"
+
+    def join(self, *parts) -> str:
+        return os.path.join(self.path, *parts)
+
+    def open(self, name: str, mode: str = "r", **kwargs):
+        return open(self.join(name), mode, **kwargs)
+
+    def run(self, args, **kwargs) -> subprocess.CompletedProcess:
+        """
+        `subprocess.run` inside the workspace.
+        """
+        kwargs.setdefault("cwd", self.path)
+        return subprocess.run(args, **kwargs)
+
+    def popen(self, args, **kwargs) -> subprocess.Popen:
+        """
+        `subprocess.Popen` inside the workspace.
+        """
+        kwargs.setdefault("cwd", self.path)
+        return subprocess.Popen(args, **kwargs)
+
+
+def _resolve(module: str, qualname: str):
+    obj = importlib.import_module(module)
+    for part in qualname.split("."):
+        obj = getattr(obj, part)
+    return obj
+
+
+def _call_wrapped(module: str, qualname: str, args, kwargs):
+    # runs in the worker process, where the name is bound to the decorated wrapper
+    return _resolve(module, qualname).__wrapped__(*args, **kwargs)
+
+
+def _submit(executor: Executor, func, args, kwargs):
+    if not isinstance(executor, ProcessPoolExecutor):
+        return executor.submit(func, *args, **kwargs)
+    # the module attribute is the wrapper, so the original function cannot be pickled by name
+    try:
+        bound = _resolve(func.__module__, func.__qualname__)
+    except (AttributeError, ImportError):
+        raise TypeError(
+            f"{func.__qualname__} must be importable from {func.__module__} to run in a worker process"
+        ) from None
+    if bound is func:
+        return executor.submit(func, *args, **kwargs)
+    if getattr(bound, "__wrapped__", None) is func:
+        return executor.submit(_call_wrapped, func.__module__, func.__qualname__, args, kwargs)
+    raise TypeError(f"{func.__qualname__} cannot be sent to a worker process")
+
+
+SHM_DIR = "/dev/shm"
+DEFAULT_POOL_BYTES = 512 * 1024 * 1024
+
+
+def _clear_directory(path: str):
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                shutil.rmtree(entry.path, ignore_errors=True)
+            else:
+                try:
+                    os.unlink(entry.path)
+                except FileNotFoundError:
+                    pass
+
+
+class WorkspacePool:
+    """
+    Keeps emptied temp directories warm for reuse, preferring tmpfs (`/dev/shm`).
+
+    Args:
+        size (int, optional): Number of idle directories kept per location. Defaults to 4.
+        max_bytes (int, optional): Budget for workspaces on tmpfs. A workspace whose expected size
+            would exceed the budget, or the free space on tmpfs, spills to the disk temp directory.
+            Defaults to 512 MiB.
+        shm_dir (str, optional): The tmpfs mount to use, None to stay on disk. Defaults to "/dev/shm".
+        disk_dir (str, optional): The disk location. Defaults to `tempfile.gettempdir()`.
+
+    Returned workspaces are emptied in place and handed out again, so a job pays neither a
+    `mkdtemp` nor a directory removal. The pool directories are removed when the pool is
+    garbage collected or at interpreter exit.
+    """
+
+    def __init__(
+        self,
+        size: int = 4,
+        max_bytes: int = DEFAULT_POOL_BYTES,
+        shm_dir: str = SHM_DIR,
+        disk_dir: str = None,
+    ):
+        self.size = size
+        self.max_bytes = max_bytes
+        self.shm_used = 0
+        self.spills = 0
+        self._lock = threading.Lock()
+        self._reserved = {}
+        self._idle = {}
+        self._base = {}
+
+        self._shm = None
+        if shm_dir is not None and os.path.isdir(shm_dir) and os.access(shm_dir, os.W_OK):
+            self._shm = self._make_base(shm_dir)
+        self._disk = self._make_base(disk_dir or tempfile.gettempdir())
+        for _ in range(size):
+            self._idle[self._shm or self._disk].append(tempfile.mkdtemp(dir=self._shm or self._disk))
+
+    def _make_base(self, parent: str) -> str:
+        base = tempfile.mkdtemp(prefix="zuu-pool-", dir=parent)
+        self._idle[base] = []
+        weakref.finalize(self, shutil.rmtree, base, True)
+        return base
+
+    def _fits_shm(self, expected_bytes: int) -> bool:
+        if self._shm is None or self.shm_used + expected_bytes > self.max_bytes:
+            return False
+        return shutil.disk_usage(self._shm).free > expected_bytes
+
+    def acquire(self, expected_bytes: int = 0) -> str:
+        """
+        Returns an empty directory, on tmpfs when `expected_bytes` fits the budget.
+        """
+        with self._lock:
+            if self._fits_shm(expected_bytes):
+                base = self._shm
+                self.shm_used += expected_bytes
+            else:
+                base = self._disk
+                if self._shm is not None:
+                    self.spills += 1
+            idle = self._idle[base]
+            path = idle.pop() if idle else None
+        if path is None:
+            path = tempfile.mkdtemp(dir=base)
+        with self._lock:
+            self._reserved[path] = (base, expected_bytes)
+        return path
+
+    def release(self, path: str):
+        """
+        Empties a workspace and keeps it for the next `acquire`, or removes it when enough are idle.
+        """
+        with self._lock:
+            base, expected_bytes = self._reserved.pop(path)
+            if base == self._shm:
+                self.shm_used -= expected_bytes
+        _clear_directory(path)
+        with self._lock:
+            idle = self._idle[base]
+            if len(idle) < self.size:
+                idle.append(path)
+                return
+        shutil.rmtree(path, ignore_errors=True)
+
+    @contextlib.contextmanager
+    def workspace(self, expected_bytes: int = 0):
+        path = self.acquire(expected_bytes)
+        try:
+            yield path
+        finally:
+            self.release(path)
+
+
+def _match_inputs(paths, cwd: str) -> list:
+    """
+    The files matched by `paths`, resolved against `cwd` rather than the process working
+    directory, which another thread's `chcwd` job may have changed. Each file is listed once.
+    """
+    files = []
+    seen = set()
+    for path in paths or ():
+        for file in glob.glob(os.path.join(glob.escape(cwd), path)):
+            # overlapping patterns match the same input more than once
+            real = os.path.realpath(file)
+            if os.path.isfile(file) and real not in seen:
+                seen.add(real)
+                files.append(file)
+    return files
+
+
+def _expected_bytes(files) -> int:
+    return sum(os.path.getsize(file) for file in files)
+
+
+def temp(
+    paths=None,
+    capture=None,
+    chcwd: bool = True,
+    err_copy_over: bool = True,
+    stage: str = "copy",
+    workspace: bool = False,
+    executor: Executor = None,
+    pool: WorkspacePool = None,
+):
     """
     Decorator that creates a temporary directory and manages file operations.
     
     Args:
         paths (list, optional): List of paths/patterns to copy to temp directory
         capture (list, optional): List of paths/patterns to copy back from temp directory
+        stage (str, optional): How inputs are placed in the temp directory, see `stage_file`.
+            With any mode other than "copy", captured outputs are moved back with `os.replace`
+            when possible instead of being copied. Defaults to "copy".
+        workspace (bool, optional): Never change the process working directory; the function
+            receives the temp directory as a `Workspace` through the `workspace` keyword instead.
+            Jobs in this mode can run concurrently on several threads. Overrides `chcwd`.
+        executor (Executor, optional): Run the function on this executor and wait for it. With a
+            `ProcessPoolExecutor` the function must be defined at module level and the arguments
+            and result must be picklable. Requires `workspace` mode.
+        pool (WorkspacePool, optional): Take the temp directory from a warm pool instead of
+            creating and deleting one per call. The inputs' total size decides whether it fits on tmpfs.
     
     Returns:
         callable: Decorated function that handles temporary directory operations
+
+    With `chcwd`, the call holds `zuu.pkg.os.CWD_LOCK`, so concurrent `chcwd` jobs and
+    `preserve_cwd` functions run one at a time instead of changing each other's directory.
+    Every mode reads the caller's working directory under that lock, and input patterns and
+    captured outputs are resolved against it.
     """
+    if stage not in STAGE_MODES:
+        raise ValueError(f"unknown stage mode {stage!r}, expected one of {STAGE_MODES}")
+    if executor is not None and not workspace:
+        raise ValueError("executor requires workspace=True")
+    chcwd = chcwd and not workspace
+
     def decorator(func):
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            
-            with tempfile.TemporaryDirectory() as temp_dir:
+            # only read while no chcwd job or preserve_cwd function is inside its directory
+            with CWD_LOCK:
+                currCwd = os.getcwd()
+            inputs = _match_inputs(paths, currCwd)
+
+            if pool is None:
+                directory = tempfile.TemporaryDirectory()
+            else:
+                directory = pool.workspace(_expected_bytes(inputs))
+
+            with directory as temp_dir, (
+                CWD_LOCK if chcwd else contextlib.nullcontext()
+            ):
                 try:
-                    # Copy files to temp directory
-                    if paths:
-                        for path in paths:
-                            for file in glob.glob(path):
-                                if os.path.isfile(file):
-                                    shutil.copy2(file, temp_dir)
+                    # Stage files into temp directory
+                    for file in inputs:
+                        stage_file(file, temp_dir, stage)
                     
                     # Execute the wrapped function
-                    currCwd = os.getcwd()
-                    if chcwd:
-                        os.chdir(temp_dir)
+                    if workspace:
+                        kwargs["workspace"] = Workspace(temp_dir)
+                        if executor is not None:
+                            result = _submit(executor, func, args, kwargs).result()
+                        else:
+                            result = func(*args, **kwargs)
+                    else:
+                        if chcwd:
+                            os.chdir(temp_dir)
 
-                    result = func(*args, **kwargs)
-                    if chcwd:
-                        os.chdir(currCwd)
+                        result = func(*args, **kwargs)
+                        if chcwd:
+                            os.chdir(currCwd)
 
                     # Copy files back from temp directory
                     if capture:
                         for pattern in capture:
                             for file in glob.glob(os.path.join(temp_dir, pattern)):
                                 if os.path.isfile(file):
-                                    shutil.copy2(file, os.getcwd())
+                                    _capture_file(file, currCwd, stage != "copy")
                     
                     return result
                 except Exception as e:
-                    os.chdir(currCwd)
-                    os.makedirs("debug", exist_ok=True)
+                    if chcwd:
+                        os.chdir(currCwd)
                     if err_copy_over:
                         # move temporary folder contents to a folder called debug
-                        shutil.copytree(temp_dir, os.path.join(os.getcwd(), "debug"))
+                        shutil.copytree(
+                            temp_dir, os.path.join(currCwd, "debug"), dirs_exist_ok=True
+                        )
                     raise e
         
         return wrapper
-    return decorator
\ No newline at end of file
+    return decorator
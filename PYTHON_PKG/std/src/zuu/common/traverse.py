@@ -1,3 +1,4 @@
+import functools as _functools
 import typing as _typing
 
 
@@ -42,6 +43,47 @@ def _traverse(obj: _typing.Union[dict, list, set, tuple], keys, create_missing=F
     return curr
 
 
+def _set_final(curr, final_key, value):
+    if isinstance(curr, dict):
+        curr[final_key] = value
+    elif isinstance(curr, list):
+        final_key = int(final_key)
+        if final_key >= len(curr):
+            curr.extend([None] * (final_key - len(curr) + 1))
+        curr[final_key] = value
+    else:
+        setattr(curr, final_key, value)
+
+
+def _del_final(curr, final_key):
+    if isinstance(curr, dict):
+        del curr[final_key]
+    elif isinstance(curr, list):
+        del curr[int(final_key)]
+    else:
+        delattr(curr, final_key)
+
+
+def _set_default_final(curr, final_key, value, fillpadding=False):
+    if isinstance(curr, set):
+        raise IndexError("set does not support default value")
+
+    if isinstance(curr, dict):
+        if final_key not in curr:
+            curr[final_key] = value
+    elif isinstance(curr, list):
+        final_key = int(final_key)
+        if final_key >= len(curr):
+            if fillpadding:
+                curr.extend([None] * (final_key - len(curr) + 1))
+            else:
+                raise IndexError(f"Index {final_key} out of range for list")
+        curr[final_key] = value
+    else:
+        if not hasattr(curr, final_key):
+            setattr(curr, final_key, value)
+
+
 def get_deep(obj: _typing.Union[dict, list, set, tuple], *keys):
     """
     Get a value from a nested object using a sequence of keys.
@@ -70,15 +112,7 @@ def set_deep(obj: _typing.Union[dict, list, set, tuple], *keys, value):
     """
     *initial_keys, final_key = keys
     curr = _traverse(obj, initial_keys, create_missing=True)
-    if isinstance(curr, dict):
-        curr[final_key] = value
-    elif isinstance(curr, list):
-        final_key = int(final_key)
-        if final_key >= len(curr):
-            curr.extend([None] * (final_key - len(curr) + 1))
-        curr[final_key] = value
-    else:
-        setattr(curr, final_key, value)
+    _set_final(curr, final_key, value)
 
 
 def del_deep(obj: _typing.Union[dict, list, set, tuple], *keys):
@@ -94,12 +128,7 @@ def del_deep(obj: _typing.Union[dict, list, set, tuple], *keys):
     """
     *initial_keys, final_key = keys
     curr = _traverse(obj, initial_keys)
-    if isinstance(curr, dict):
-        del curr[final_key]
-    elif isinstance(curr, list):
-        del curr[int(final_key)]
-    else:
-        delattr(curr, final_key)
+    _del_final(curr, final_key)
 
 
 def set_default_deep(
@@ -120,21 +149,567 @@ def set_default_deep(
     """
     *initial_keys, final_key = keys
     curr = _traverse(obj, initial_keys, create_missing=True)
+    _set_default_final(curr, final_key, value, fillpadding)
+
+
+_MISSING = object()
+
+
+def _as_index(key):
+    if isinstance(key, int):
+        return key
+    try:
+        return int(key)
+    except (TypeError, ValueError):
+        return None
+
+
+class CompiledPath:
+    """
+    A pre-parsed key sequence that can be applied to many objects.
+
+    The path is split and every step's list index is resolved once, so `get`,
+    `set` and `delete` only dispatch on the container type while walking. The
+    lookup rules are the same as `get_deep`, `set_deep` and `del_deep`.
+    """
+
+    __slots__ = ("keys", "_steps")
+
+    def __init__(self, *keys, sep: str = "."):
+        if len(keys) == 1 and isinstance(keys[0], str):
+            keys = tuple(keys[0].split(sep))
+        if not keys:
+            raise ValueError("path must contain at least one key")
+        self.keys = keys
+        self._steps = tuple((key, _as_index(key)) for key in keys)
+
+    def __repr__(self):
+        return f"CompiledPath{self.keys!r}"
+
+    @staticmethod
+    def _walk(obj, steps, create_missing=False):
+        curr = obj
+        for key, index in steps:
+            if isinstance(curr, dict):
+                if create_missing and key not in curr:
+                    curr[key] = {}
+                curr = curr.get(key)
+                if curr is None:
+                    raise KeyError(f"Key {key} not found in dictionary")
+            elif isinstance(curr, (list, tuple)):
+                if index is None:
+                    index = int(key)
+                if create_missing and isinstance(curr, list) and index >= len(curr):
+                    curr.extend({} for _ in range(index - len(curr) + 1))
+                try:
+                    curr = curr[index]
+                except IndexError:
+                    raise KeyError(f"Index {key} out of range for list")
+            elif isinstance(curr, set):
+                try:
+                    curr = list(curr)[int(key) if index is None else index]
+                except IndexError:
+                    raise KeyError(f"Index {key} out of range for set/tuple")
+            else:
+                try:
+                    curr = getattr(curr, key)
+                except AttributeError:
+                    raise KeyError(f"Attribute {key} not found")
+        return curr
+
+    def get(self, obj, default=_MISSING):
+        """
+        Get the value at this path.
+
+        Args:
+            obj: The nested object to read from.
+            default (optional): Returned instead of raising `KeyError` when the path does not exist.
+        """
+        try:
+            return self._get(obj)
+        except KeyError:
+            if default is _MISSING:
+                raise
+            return default
+
+    def _get(self, obj):
+        # fast loop for plain dict/list/tuple nodes, anything else goes through _walk
+        curr = obj
+        for pos, (key, index) in enumerate(self._steps):
+            cls = type(curr)
+            if cls is dict:
+                curr = curr.get(key)
+                if curr is None:
+                    raise KeyError(f"Key {key} not found in dictionary")
+            elif (cls is list or cls is tuple) and index is not None:
+                try:
+                    curr = curr[index]
+                except IndexError:
+                    raise KeyError(f"Index {key} out of range for list")
+            else:
+                return self._walk(curr, self._steps[pos:])
+        return curr
+
+    def get_many(self, records: _typing.Iterable, default=_MISSING) -> list:
+        """
+        Get the value at this path from every record.
+
+        Args:
+            records (typing.Iterable): The nested objects to read from.
+            default (optional): Used for records where the path does not exist. If omitted, `KeyError` is raised.
+        """
+        get = self._get
+        if default is _MISSING:
+            return [get(record) for record in records]
+
+        result = []
+        for record in records:
+            try:
+                result.append(get(record))
+            except KeyError:
+                result.append(default)
+        return result
+
+    def set(self, obj, value):
+        """
+        Set the value at this path, creating missing intermediate containers like `set_deep`.
+        """
+        curr = self._walk(obj, self._steps[:-1], create_missing=True)
+        _set_final(curr, self.keys[-1], value)
+
+    def delete(self, obj):
+        """
+        Delete the value at this path like `del_deep`.
+        """
+        curr = self._walk(obj, self._steps[:-1])
+        _del_final(curr, self.keys[-1])
+
+
+@_functools.lru_cache(maxsize=256)
+def compile_path(*keys, sep: str = ".") -> CompiledPath:
+    """
+    Compile a path into a reusable `CompiledPath`.
+
+    Args:
+        *keys: Either a single separated string such as "a.b.0.c" or the keys themselves.
+        sep (str, optional): The separator used to split a string path. Defaults to ".".
+
+    Returns:
+        CompiledPath: The compiled accessor. Repeated calls with the same path return the same object.
+
+    Example:
+        >>> path = compile_path("a.b.0.c")
+        >>> path.get({"a": {"b": [{"c": 1}]}})
+        1
+    """
+    return CompiledPath(*keys, sep=sep)
+
+
+def _children(node):
+    if isinstance(node, dict):
+        return iter(node.items())
+    if isinstance(node, (list, tuple)):
+        return enumerate(node)
+    return iter(())
 
-    if isinstance(curr, set):
-        raise IndexError("set does not support default value")
+
+def _wildcard_states(node, path, pos):
+    for key, child in _children(node):
+        yield child, path + (key,), pos + 1
+
+
+def _recursive_states(node, path, pos):
+    # "**" first matches zero levels, then one more level at a time
+    yield node, path, pos + 1
+    for key, child in _children(node):
+        yield child, path + (key,), pos
+
+
+def iter_match(
+    obj: _typing.Union[dict, list, tuple],
+    pattern: _typing.Union[str, _typing.Sequence],
+    limit: int = None,
+    sep: str = ".",
+) -> _typing.Iterator[_typing.Tuple[tuple, _typing.Any]]:
+    """
+    Lazily find every value in a nested object whose path matches a pattern.
+
+    Args:
+        obj (typing.Union[dict, list, tuple]): The nested object to search.
+        pattern (typing.Union[str, typing.Sequence]): A separated string such as "services.*.limits.cpu"
+            or a sequence of segments. "*" matches any single key or index, "**" matches any number of levels
+            (including none) and any other segment must match exactly.
+        limit (int, optional): Stop after this many matches. Defaults to no limit.
+        sep (str, optional): The separator used to split a string pattern. Defaults to ".".
+
+    Yields:
+        tuple: (path, value) pairs in document order, where path is the tuple of keys leading to value.
+
+    The search walks the object with an explicit stack of iterators, so nothing is collected up front
+    and the walk stops as soon as the caller stops consuming or `limit` is reached.
+
+    Example:
+        >>> doc = {"services": {"api": {"limits": {"cpu": 2}}, "db": {"limits": {"cpu": 4}}}}
+        >>> list(iter_match(doc, "services.*.limits.cpu"))
+        [(('services', 'api', 'limits', 'cpu'), 2), (('services', 'db', 'limits', 'cpu'), 4)]
+        >>> [v for _, v in iter_match(doc, "**.cpu", limit=1)]
+        [2]
+    """
+    segments = pattern.split(sep) if isinstance(pattern, str) else list(pattern)
+    # consecutive "**" segments are equivalent to one
+    segments = [
+        seg
+        for i, seg in enumerate(segments)
+        if not (seg == "**" and i > 0 and segments[i - 1] == "**")
+    ]
+    end = len(segments)
+    indices = [_as_index(seg) for seg in segments]
+    # with several "**" the same path can be reached through different splits
+    seen = set() if segments.count("**") > 1 else None
+
+    if limit is not None and limit <= 0:
+        return
+
+    count = 0
+    stack = [iter(((obj, (), 0),))]
+    while stack:
+        state = next(stack[-1], None)
+        if state is None:
+            stack.pop()
+            continue
+
+        node, path, pos = state
+        if pos == end:
+            if seen is not None:
+                if path in seen:
+                    continue
+                seen.add(path)
+            yield path, node
+            count += 1
+            if limit is not None and count >= limit:
+                return
+            continue
+
+        seg = segments[pos]
+        if seg == "**":
+            stack.append(_recursive_states(node, path, pos))
+        elif seg == "*":
+            stack.append(_wildcard_states(node, path, pos))
+        elif isinstance(node, dict):
+            if seg in node:
+                stack.append(iter(((node[seg], path + (seg,), pos + 1),)))
+            elif indices[pos] is not None and indices[pos] in node:
+                key = indices[pos]
+                stack.append(iter(((node[key], path + (key,), pos + 1),)))
+        elif isinstance(node, (list, tuple)):
+            index = indices[pos]
+            if index is not None and -len(node) <= index < len(node):
+                stack.append(iter(((node[index], path + (index,), pos + 1),)))
+
+
+_PATCH_OPS = ("set", "delete", "setdefault")
+
+
+class _PatchNode:
+    __slots__ = ("children", "ops", "creates")
+
+    def __init__(self):
+        self.children = {}
+        # final key -> [(operation, value), ...] for operations ending in this container
+        self.ops = {}
+        self.creates = False
+
+
+def _build_patch_trie(ops, sep) -> _PatchNode:
+    # group by parent path first, so the trie only holds distinct containers
+    groups = {}
+    full_paths = []
+    for op in ops:
+        size = len(op) if isinstance(op, (tuple, list)) else 0
+        name = op[0] if size else None
+        if size == 3 and (name == "set" or name == "setdefault"):
+            value = op[2]
+        elif size == 2 and name == "delete":
+            value = None
+        elif name in _PATCH_OPS:
+            raise ValueError(f"Wrong number of arguments for {name}: {op!r}")
+        elif size in (2, 3):
+            raise ValueError(f"Unknown patch operation {name!r}")
+        else:
+            raise ValueError(f"Invalid patch operation {op!r}")
+
+        path = op[1]
+        keys = tuple(path.split(sep)) if isinstance(path, str) else tuple(path)
+        if not keys:
+            raise ValueError(f"Empty path in patch operation {op!r}")
+
+        full_paths.append(keys)
+        parent = keys[:-1]
+        group = groups.get(parent)
+        if group is None:
+            group = groups[parent] = []
+        group.append((keys[-1], name, value))
+
+    prefixes = set()
+    for parent in groups:
+        for depth in range(1, len(parent) + 1):
+            prefixes.add(parent[:depth])
+    for keys in full_paths:
+        if keys in prefixes:
+            raise ValueError(f"Path {keys!r} is a prefix of another patched path")
+
+    root = _PatchNode()
+    for parent, group in groups.items():
+        creates = any(name != "delete" for _, name, _ in group)
+        node = root
+        node.creates |= creates
+        for key in parent:
+            child = node.children.get(key)
+            if child is None:
+                child = node.children[key] = _PatchNode()
+            node = child
+            node.creates |= creates
+        for key, name, value in group:
+            leaf = node.ops.get(key)
+            if leaf is None:
+                leaf = node.ops[key] = []
+            leaf.append((name, value))
+    return root
+
+
+_NO_ATTRIBUTES = (str, bytes, int, float, complex, bool, type(None))
+
+
+def _check_setattr(curr, key, where):
+    if isinstance(curr, _NO_ATTRIBUTES) or not (
+        hasattr(curr, "__dict__") or hasattr(curr, key)
+    ):
+        raise AttributeError(
+            f"Cannot set attribute {key!r} on {type(curr).__name__} at {where!r}"
+        )
+
+
+def _list_index(key, where) -> int:
+    index = _as_index(key)
+    if index is None:
+        raise ValueError(f"Invalid list index {key!r} at {where!r}")
+    return index
+
+
+def _check_leaf(curr, key, leaf, where, length, fillpadding):
+    """
+    Dry-runs the operations ending at `key` with the rules of `_set_final`, `_del_final` and
+    `_set_default_final`. Returns the list length after them (None for other containers).
+    """
+    if isinstance(curr, (tuple, set, frozenset)):
+        for name, _ in leaf:
+            if name == "setdefault" and isinstance(curr, set):
+                raise IndexError(f"set does not support default value at {where!r}")
+            raise AttributeError(f"Cannot modify {type(curr).__name__} at {where!r}")
 
     if isinstance(curr, dict):
-        if final_key not in curr:
-            curr[final_key] = value
+        exists = key in curr
     elif isinstance(curr, list):
-        final_key = int(final_key)
-        if final_key >= len(curr):
-            if fillpadding:
-                curr.extend([None] * (final_key - len(curr) + 1))
-            else:
-                raise IndexError(f"Index {final_key} out of range for list")
-        curr[final_key] = value
+        index = _list_index(key, where)
+        exists = -length <= index < length
     else:
-        if not hasattr(curr, final_key):
-            setattr(curr, final_key, value)
+        exists = hasattr(curr, key)
+
+    for name, _ in leaf:
+        if name == "delete":
+            if not exists:
+                raise KeyError(f"Cannot delete missing path {where!r}")
+            exists = False
+            if length is not None:
+                length -= 1
+        elif isinstance(curr, list):
+            if index < -length:
+                raise IndexError(f"Index {key} out of range for list at {where!r}")
+            if index >= length:
+                if name == "setdefault" and not fillpadding:
+                    raise IndexError(f"Index {key} out of range for list at {where!r}")
+                length = index + 1
+            exists = True
+        elif isinstance(curr, dict):
+            exists = True
+        elif not (name == "setdefault" and exists):
+            _check_setattr(curr, key, where)
+            exists = True
+    return length
+
+
+def _check_step(curr, key, child, where, length):
+    """
+    Dry-runs one `CompiledPath._walk` step, with `create_missing` when the branch creates values.
+    Returns the container the branch continues in; a fresh dict stands in for created ones.
+    """
+    if isinstance(curr, dict):
+        if key not in curr:
+            if not child.creates:
+                raise KeyError(f"Path {where!r} not found")
+            return {}
+        nxt = curr[key]
+        if nxt is None:
+            raise KeyError(f"Key {key} not found in dictionary")
+        return nxt
+
+    if isinstance(curr, (list, tuple, set, frozenset)):
+        index = _list_index(key, where)
+        size = length if isinstance(curr, list) else len(curr)
+        if index >= size and isinstance(curr, list) and child.creates:
+            return {}
+        if not -size <= index < size:
+            raise KeyError(f"Index {key} out of range for list at {where!r}")
+        items = curr if isinstance(curr, (list, tuple)) else list(curr)
+        # indices past the current end were padded with None by a "set"
+        return items[index] if -len(items) <= index < len(items) else None
+
+    try:
+        return getattr(curr, key)
+    except (AttributeError, TypeError):
+        raise KeyError(f"Attribute {key} not found at {where!r}")
+
+
+def _check_patch(obj, root: _PatchNode, fillpadding: bool = False):
+    # read-only dry run of apply_patch, so a failing batch leaves obj untouched
+    stack = [(obj, root, ())]
+    while stack:
+        curr, node, path = stack.pop()
+        length = len(curr) if isinstance(curr, list) else None
+        for key, leaf in node.ops.items():
+            length = _check_leaf(curr, key, leaf, path + (key,), length, fillpadding)
+
+        for key, child in node.children.items():
+            nxt = _check_step(curr, key, child, path + (key,), length)
+            stack.append((nxt, child, path + (key,)))
+
+
+def apply_patch(
+    obj: _typing.Union[dict, list],
+    ops: _typing.Iterable[tuple],
+    sep: str = ".",
+    fillpadding: bool = False,
+):
+    """
+    Apply a batch of set, delete and set-default operations to a nested object.
+
+    Args:
+        obj (typing.Union[dict, list]): The nested object to modify in place.
+        ops (typing.Iterable[tuple]): Operations as ("set", path, value), ("delete", path) or
+            ("setdefault", path, value). A path is a separated string such as "a.b.0" or a sequence of keys.
+        sep (str, optional): The separator used to split string paths. Defaults to ".".
+        fillpadding (bool, optional): Passed on to "setdefault" operations, see `set_default_deep`.
+
+    Returns:
+        None
+
+    Raises:
+        ValueError: If an operation is malformed, one patched path runs through another, or a list
+            is indexed with a non-integer key.
+        KeyError: If a "delete" targets a missing path or a branch cannot be walked or created.
+        IndexError: If a "setdefault" goes past the end of a list without `fillpadding`.
+        AttributeError: If a value cannot be set on the target, e.g. a scalar, tuple or set.
+
+    The operations are grouped into a prefix trie so every shared prefix is walked once, and the
+    whole batch is dry-run against `obj` with the same rules as the apply pass, so an error is
+    raised before anything is modified. Operations on the same path
+    are applied in the given order; operations on different paths must not depend on each other,
+    e.g. deleting a list item shifts the indices used by other operations on that list.
+
+    Example:
+        >>> doc = {"a": {"b": 1, "c": 2}}
+        >>> apply_patch(doc, [("set", "a.b", 10), ("delete", "a.c"), ("setdefault", "a.d", 4)])
+        >>> doc
+        {'a': {'b': 10, 'd': 4}}
+    """
+    root = _build_patch_trie(ops, sep)
+    _check_patch(obj, root, fillpadding)
+
+    stack = [(obj, root)]
+    while stack:
+        curr, node = stack.pop()
+        for key, leaf in node.ops.items():
+            for name, value in leaf:
+                if name == "set":
+                    _set_final(curr, key, value)
+                elif name == "delete":
+                    _del_final(curr, key)
+                else:
+                    _set_default_final(curr, key, value, fillpadding)
+
+        for key, child in node.children.items():
+            nxt = CompiledPath._walk(
+                curr, ((key, _as_index(key)),), create_missing=child.creates
+            )
+            stack.append((nxt, child))
+
+
+def diff(a: _typing.Union[dict, list], b: _typing.Union[dict, list]) -> list:
+    """
+    Compute the operations that turn one nested object into another.
+
+    Args:
+        a (typing.Union[dict, list]): The old object.
+        b (typing.Union[dict, list]): The new object.
+
+    Returns:
+        list: ("set", path, value) and ("delete", path) operations with tuple paths, ready for
+        `apply_patch(a, ops)` or for `set_deep(a, *path, value=value)` / `del_deep(a, *path)` in order.
+
+    Raises:
+        ValueError: If the roots differ and are not both dicts or both lists.
+
+    Subtrees that are the same object are skipped without being walked. Leaves only count as unchanged
+    when their types match too, so 1, 1.0 and True are different values, as they are in JSON. Dicts are
+    compared key by key, lists index by index over their common length, with new trailing items set
+    and removed trailing items deleted from the end. Values whose type changed are replaced whole.
+
+    Example:
+        >>> diff({"a": 1, "b": {"c": [1, 2]}}, {"a": 1, "b": {"c": [1]}, "d": 4})
+        [('set', ('d',), 4), ('delete', ('b', 'c', 1))]
+    """
+    if a is b:
+        return []
+    if not (
+        (isinstance(a, dict) and isinstance(b, dict))
+        or (isinstance(a, list) and isinstance(b, list))
+    ):
+        raise ValueError("diff needs two dicts or two lists at the root")
+
+    ops = []
+    stack = [((), a, b)]
+    while stack:
+        path, old, new = stack.pop()
+        nested = []
+        if isinstance(old, dict):
+            for key, value in old.items():
+                if key not in new:
+                    ops.append(("delete", path + (key,)))
+            for key, value in new.items():
+                if key not in old:
+                    ops.append(("set", path + (key,), value))
+                else:
+                    nested.append((path + (key,), old[key], value))
+        else:
+            common = min(len(old), len(new))
+            for index in range(len(old) - 1, common - 1, -1):
+                ops.append(("delete", path + (index,)))
+            for index in range(common, len(new)):
+                ops.append(("set", path + (index,), new[index]))
+            for index in range(common):
+                nested.append((path + (index,), old[index], new[index]))
+
+        containers = []
+        for child in nested:
+            child_path, old_value, new_value = child
+            if old_value is new_value:
+                continue
+            if (isinstance(old_value, dict) and isinstance(new_value, dict)) or (
+                isinstance(old_value, list) and isinstance(new_value, list)
+            ):
+                # equal containers may still hold 1 where the other has True, walk them
+                containers.append(child)
+            elif type(old_value) is not type(new_value) or old_value != new_value:
+                ops.append(("set", child_path, new_value))
+        stack.extend(reversed(containers))
+    return ops
@@ -1,16 +1,498 @@
+from concurrent.futures import ThreadPoolExecutor
+import errno
 import hashlib
+import json
 import os
+import re
+import threading
+import typing
+import zlib
 
-__all__ = ["sha256"]
+__all__ = [
+    "sha256",
+    "MultiHasher",
+    "hash_file",
+    "hash_bytes",
+    "DigestCache",
+    "hash_many",
+    "hash_tree",
+    "MerkleSnapshot",
+    "merkle_snapshot",
+]
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+# fast non-cryptographic checksums, reported as hex like the hashlib digests
+_CHECKSUMS = {"crc32": zlib.crc32, "adler32": zlib.adler32}
+_CHECKSUM_START = {"crc32": 0, "adler32": 1}
+
+# searches any buffer, including memoryviews, without copying it
+_CR = re.compile(b"\r")
+
+
+class MultiHasher:
+    """
+    Computes several digests over the same stream in one pass.
+
+    Args:
+        algorithms (typing.Iterable[str]): hashlib algorithm names (e.g. "sha256", "md5") and/or the
+            fast checksums "crc32" and "adler32".
+        normalize_newlines (bool, optional): Hash "\\r\\n" as "\\n". A "\\r" at the end of one chunk is
+            held back until the next chunk shows whether a "\\n" follows, so line endings split across
+            chunk boundaries are handled. Chunks without "\\r" are hashed without being copied.
+    """
+
+    def __init__(
+        self,
+        algorithms: typing.Iterable[str] = ("sha256",),
+        normalize_newlines: bool = False,
+    ):
+        algorithms = tuple(algorithms)
+        if not algorithms:
+            raise ValueError("at least one algorithm is required")
+        self.algorithms = algorithms
+        self.normalize_newlines = normalize_newlines
+        self._hashers = {a: hashlib.new(a) for a in algorithms if a not in _CHECKSUMS}
+        self._checksums = {a: _CHECKSUM_START[a] for a in algorithms if a in _CHECKSUMS}
+        self._pending_cr = False
+
+    def _feed(self, data):
+        for hasher in self._hashers.values():
+            hasher.update(data)
+        for name, value in self._checksums.items():
+            self._checksums[name] = _CHECKSUMS[name](data, value)
+
+    def update(self, data: typing.Union[bytes, bytearray, memoryview]) -> None:
+        if not self.normalize_newlines:
+            self._feed(data)
+            return
+        if not data:
+            return
+
+        if self._pending_cr:
+            self._pending_cr = False
+            if data[:1] != b"\n":
+                self._feed(b"\r")
+
+        if _CR.search(data) is None:
+            self._feed(data)
+            return
+
+        data = bytes(data)
+        if data.endswith(b"\r"):
+            self._pending_cr = True
+            data = data[:-1]
+        self._feed(data.replace(b"\r\n", b"\n"))
+
+    def _flush(self):
+        if self._pending_cr:
+            self._pending_cr = False
+            self._feed(b"\r")
+
+    def hexdigests(self) -> typing.Dict[str, str]:
+        """
+        Finishes the stream and returns the hex digest of every algorithm.
+        """
+        self._flush()
+        digests = {a: h.hexdigest() for a, h in self._hashers.items()}
+        for name, value in self._checksums.items():
+            digests[name] = format(value & 0xFFFFFFFF, "08x")
+        return {a: digests[a] for a in self.algorithms}
+
+
+def hash_file(
+    path: str,
+    algorithms: typing.Iterable[str] = ("sha256",),
+    normalize_newlines: bool = False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> typing.Dict[str, str]:
+    """
+    Hash a file with several algorithms in a single read pass.
+
+    Args:
+        path (str): The file to hash.
+        algorithms (typing.Iterable[str], optional): See `MultiHasher`. Defaults to ("sha256",).
+        normalize_newlines (bool, optional): Hash "\\r\\n" as "\\n". Defaults to False.
+        chunk_size (int, optional): Size of the reused read buffer. Defaults to 1 MiB.
+
+    Returns:
+        dict: algorithm name -> hex digest.
+    """
+    hasher = MultiHasher(algorithms, normalize_newlines)
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                break
+            hasher.update(view[:n])
+    return hasher.hexdigests()
+
+
+def hash_bytes(
+    data: typing.Union[bytes, str],
+    algorithms: typing.Iterable[str] = ("sha256",),
+    normalize_newlines: bool = False,
+) -> typing.Dict[str, str]:
+    """
+    Hash bytes (or a string, encoded as UTF-8) with several algorithms.
+
+    Returns:
+        dict: algorithm name -> hex digest.
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    hasher = MultiHasher(algorithms, normalize_newlines)
+    hasher.update(data)
+    return hasher.hexdigests()
 
 
 def sha256(string: str) -> str:
-    hasher = hashlib.sha256()
+    """
+    SHA-256 of a file with "\\r\\n" hashed as "\\n", or of the string itself when it is not an existing path.
+    """
     if not os.path.exists(string):
-        return hasher(string).hexdigest()
+        return hash_bytes(string)["sha256"]
+    return hash_file(string, normalize_newlines=True)["sha256"]
+
+
+def _stat_key(st: os.stat_result) -> list:
+    return [st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns]
+
+
+class DigestCache:
+    """
+    Remembers file digests by stat identity (device, inode, size, mtime_ns).
+
+    A file whose stat identity is unchanged is answered from the cache without being read. With a
+    `path`, the cache is loaded from and saved to that JSON file, so it survives restarts; without
+    one it only lives in memory.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self.entries: typing.Dict[str, list] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        if path is not None and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == self.VERSION:
+                    self.entries = data["entries"]
+            except (OSError, ValueError, KeyError):
+                # a broken cache only costs a rehash
+                self.entries = {}
+
+    def get(self, path: str, st: os.stat_result, algorithms: typing.Iterable[str]):
+        """
+        Returns the cached digests for every requested algorithm, or None if any is missing or stale.
+        """
+        entry = self.entries.get(path)
+        if entry is None or entry[0] != _stat_key(st):
+            return None
+        digests = entry[1]
+        try:
+            return {a: digests[a] for a in algorithms}
+        except KeyError:
+            return None
+
+    def put(self, path: str, st: os.stat_result, digests: typing.Dict[str, str]):
+        key = _stat_key(st)
+        with self._lock:
+            entry = self.entries.get(path)
+            if entry is not None and entry[0] == key:
+                entry[1].update(digests)
+            else:
+                self.entries[path] = [key, dict(digests)]
+            self._dirty = True
+
+    def prune(self, root: str, keep: typing.Iterable[str]):
+        """
+        Drops the entries below `root` that are not in `keep`.
+        """
+        keep = set(keep)
+        prefix = os.path.join(root, "")
+        with self._lock:
+            for path in [p for p in self.entries if p.startswith(prefix) and p not in keep]:
+                del self.entries[path]
+                self._dirty = True
+
+    def save(self):
+        """
+        Writes the cache to its file, atomically, if anything changed.
+        """
+        if self.path is None or not self._dirty:
+            return
+        with self._lock:
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"version": self.VERSION, "entries": self.entries}, f)
+            os.replace(tmp, self.path)
+            self._dirty = False
+
+
+def hash_many(
+    paths: typing.Iterable[str],
+    algorithms: typing.Iterable[str] = ("sha256",),
+    normalize_newlines: bool = False,
+    cache: typing.Union["DigestCache", str] = None,
+    max_workers: int = None,
+) -> typing.Dict[str, typing.Dict[str, str]]:
+    """
+    Hash many files on a thread pool, skipping files whose digests are cached.
+
+    Args:
+        paths (typing.Iterable[str]): The files to hash.
+        algorithms (typing.Iterable[str], optional): See `MultiHasher`. Defaults to ("sha256",).
+        normalize_newlines (bool, optional): Hash "\\r\\n" as "\\n". Defaults to False.
+        cache (typing.Union[DigestCache, str], optional): A `DigestCache` or the path of its file.
+        max_workers (int, optional): Thread pool size. Defaults to the `ThreadPoolExecutor` default.
+
+    Returns:
+        dict: absolute path -> {algorithm: hex digest}.
+
+    hashlib releases the GIL while hashing large buffers, so files are hashed in parallel. Each file
+    is stat'ed once; when its (device, inode, size, mtime_ns) matches the cache it is not read at all.
+    A cache given by path is saved before returning.
+    """
+    algorithms = tuple(algorithms)
+    # normalized and raw digests are different values, keep them apart in the cache
+    names = [f"{a}+nl" if normalize_newlines else a for a in algorithms]
+    if isinstance(cache, str):
+        cache = DigestCache(cache)
+
+    results = {}
+    todo = []
+    for path in paths:
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        cached = cache.get(path, st, names) if cache is not None else None
+        if cached is not None:
+            results[path] = {a: cached[n] for a, n in zip(algorithms, names)}
+        else:
+            todo.append((path, st))
+
+    if todo:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                (path, st, executor.submit(hash_file, path, algorithms, normalize_newlines))
+                for path, st in todo
+            ]
+            for path, st, future in futures:
+                digests = future.result()
+                results[path] = digests
+                if cache is not None:
+                    cache.put(path, st, {n: digests[a] for a, n in zip(algorithms, names)})
+
+    if cache is not None:
+        cache.save()
+    return results
+
+
+def _check_dir(root: str):
+    # os.walk swallows these errors and yields nothing, which would read as an empty tree
+    if not os.path.exists(root):
+        raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), root)
+    if not os.path.isdir(root):
+        raise NotADirectoryError(errno.ENOTDIR, os.strerror(errno.ENOTDIR), root)
+
+
+def hash_tree(
+    root: str,
+    algorithms: typing.Iterable[str] = ("sha256",),
+    normalize_newlines: bool = False,
+    cache: typing.Union["DigestCache", str] = None,
+    max_workers: int = None,
+) -> typing.Dict[str, typing.Dict[str, str]]:
+    """
+    Hash every file below a directory with `hash_many`.
+
+    Returns:
+        dict: path relative to `root` (with "/" separators) -> {algorithm: hex digest}.
+
+    Symlinks are not followed. Cache entries for files that disappeared from the tree are dropped.
+
+    Raises:
+        FileNotFoundError: `root` does not exist.
+        NotADirectoryError: `root` is not a directory.
+    """
+    root = os.path.abspath(root)
+    _check_dir(root)
+    paths = []
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            if not os.path.islink(path):
+                paths.append(path)
+
+    if isinstance(cache, str):
+        cache = DigestCache(cache)
+    if cache is not None:
+        cache.prune(root, paths)
+
+    results = hash_many(paths, algorithms, normalize_newlines, cache, max_workers)
+    return {
+        os.path.relpath(path, root).replace(os.sep, "/"): digests
+        for path, digests in results.items()
+    }
+
+
+def _directory_digest(algorithm: str, children: typing.Iterable[tuple]) -> str:
+    hasher = MultiHasher((algorithm,))
+    for kind, name, digest in children:
+        hasher.update(f"{kind} {name}\0{digest}\n".encode("utf-8"))
+    return hasher.hexdigests()[algorithm]
+
+
+class MerkleSnapshot:
+    """
+    Digests of every file and directory below a root, as built by `merkle_snapshot`.
+
+    `digests` maps relative paths ("/" separators, "" for the root) to hex digests. A directory's
+    digest covers the names, kinds and digests of its children, so two snapshots with the same
+    `digest` have identical trees, and `diff` only descends into directories whose digests differ.
+    """
+
+    VERSION = 1
+
+    def __init__(
+        self,
+        algorithm: str,
+        digests: typing.Dict[str, str],
+        dirs: typing.Dict[str, typing.List[str]],
+    ):
+        self.algorithm = algorithm
+        self.digests = digests
+        self.dirs = dirs
+
+    @property
+    def digest(self) -> str:
+        return self.digests[""]
+
+    def __eq__(self, other):
+        if not isinstance(other, MerkleSnapshot):
+            return NotImplemented
+        return self.algorithm == other.algorithm and self.digest == other.digest
+
+    def diff(self, other: "MerkleSnapshot") -> typing.Dict[str, typing.List[str]]:
+        """
+        Compares this (older) snapshot with `other` (newer).
+
+        Returns:
+            dict: "added", "removed" and "changed" lists of relative paths. A changed directory is
+            listed along with the changed paths inside it; added or removed directories are listed
+            without their contents.
+        """
+        if self.algorithm != other.algorithm:
+            raise ValueError(f"cannot compare {self.algorithm} and {other.algorithm} snapshots")
+        result = {"added": [], "removed": [], "changed": []}
+        stack = [""]
+        while stack:
+            path = stack.pop()
+            if self.digests[path] == other.digests[path]:
+                continue
+            result["changed"].append(path)
+            old = set(self.dirs.get(path, ()))
+            new = set(other.dirs.get(path, ()))
+            for name in sorted(old | new):
+                child = f"{path}/{name}" if path else name
+                if name not in new:
+                    result["removed"].append(child)
+                elif name not in old:
+                    result["added"].append(child)
+                elif (child in self.dirs) != (child in other.dirs):
+                    # a file replaced by a directory or the other way around
+                    result["removed"].append(child)
+                    result["added"].append(child)
+                elif child in self.dirs:
+                    stack.append(child)
+                elif self.digests[child] != other.digests[child]:
+                    result["changed"].append(child)
+        for paths in result.values():
+            paths.sort()
+        return result
+
+    def save(self, path: str):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": self.VERSION,
+                    "algorithm": self.algorithm,
+                    "digests": self.digests,
+                    "dirs": self.dirs,
+                },
+                f,
+            )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "MerkleSnapshot":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != cls.VERSION:
+            raise ValueError(f"unsupported snapshot version {data.get('version')}")
+        return cls(data["algorithm"], data["digests"], data["dirs"])
+
+
+def merkle_snapshot(
+    root: str,
+    algorithm: str = "sha256",
+    cache: typing.Union["DigestCache", str] = None,
+    max_workers: int = None,
+) -> MerkleSnapshot:
+    """
+    Build a Merkle snapshot of a directory.
+
+    Args:
+        root (str): The directory to snapshot.
+        algorithm (str, optional): Digest algorithm for files and directories. Defaults to "sha256".
+        cache (typing.Union[DigestCache, str], optional): Passed to `hash_many`. With a persistent
+            cache a re-check only reads the files whose stat identity changed; directory digests are
+            then rebuilt from their children's digests without touching file contents.
+        max_workers (int, optional): Thread pool size for hashing files.
+
+    Symlinks are not followed and not included.
+
+    Raises:
+        FileNotFoundError: `root` does not exist.
+        NotADirectoryError: `root` is not a directory.
+    """
+    root = os.path.abspath(root)
+    _check_dir(root)
+    layout = []
+    paths = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not os.path.islink(os.path.join(dirpath, d))]
+        files = [f for f in filenames if not os.path.islink(os.path.join(dirpath, f))]
+        rel = os.path.relpath(dirpath, root).replace(os.sep, "/")
+        layout.append(("" if rel == "." else rel, dirpath, list(dirnames), files))
+        paths.extend(os.path.join(dirpath, f) for f in files)
+
+    if isinstance(cache, str):
+        cache = DigestCache(cache)
+    if cache is not None:
+        cache.prune(root, paths)
+    hashed = hash_many(paths, (algorithm,), cache=cache, max_workers=max_workers)
+
+    digests = {}
+    dirs = {}
+    # os.walk is top-down, so walking it backwards finishes every child directory before its parent
+    for rel, dirpath, dirnames, files in reversed(layout):
+        children = []
+        for name in files:
+            child = f"{rel}/{name}" if rel else name
+            digests[child] = hashed[os.path.join(dirpath, name)][algorithm]
+            children.append(("f", name, digests[child]))
+        for name in dirnames:
+            child = f"{rel}/{name}" if rel else name
+            children.append(("d", name, digests[child]))
+        children.sort(key=lambda c: c[1])
+        digests[rel] = _directory_digest(algorithm, children)
+        dirs[rel] = [c[1] for c in children]
 
-    with open(string, "rb") as f:
-        for chunk in iter(lambda: f.read(65536), b""):
-            chunk = chunk.replace(b"\r\n", b"\n")
-            hasher.update(chunk)
-    return hasher.hexdigest()
+    return MerkleSnapshot(algorithm, digests, dirs)
@@ -0,0 +1,198 @@
+import ctypes
+import ctypes.util
+import itertools
+import os
+import struct
+import sys
+import threading
+from ..common.singleton import SingletonMeta
+
+__all__ = ["is_supported", "InotifyWatcher"]
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+)
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+_libc = None
+
+
+def _load_libc():
+    global _libc
+    if _libc is None:
+        lib = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        lib.inotify_init1.argtypes = [ctypes.c_int]
+        lib.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        lib.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        _libc = lib
+    return _libc
+
+
+def is_supported() -> bool:
+    """
+    Check whether inotify can be used on this platform.
+
+    Returns:
+        bool: True on Linux when libc exposes the inotify calls, False otherwise.
+    """
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        lib = _load_libc()
+        return hasattr(lib, "inotify_init1")
+    except (OSError, AttributeError):
+        return False
+
+
+class InotifyWatcher(metaclass=SingletonMeta):
+    """
+    A process-wide inotify watcher that keeps one change counter per watched file.
+
+    Files are watched through their parent directory, so in-place writes, atomic
+    replaces (rename over the file) and deletions are all seen. A single daemon
+    thread reads the events and advances the matching entries in `changes`.
+
+    `changes` maps absolute paths to a number that takes a new value on every change,
+    or has no entry when the path is not watched, in which case callers should fall
+    back to polling. Each reader remembers the value it last loaded at, so any number
+    of readers can share a watch without clearing each other's view.
+    """
+
+    def __init__(self):
+        self.changes = {}
+        # one sequence for all paths, so a value is never reused when a path is watched again
+        self._sequence = itertools.count(1)
+        self._lock = threading.Lock()
+        self._fd = None
+        self._thread = None
+        self._dir_by_wd = {}
+        self._wd_by_dir = {}
+        self._files_by_dir = {}
+
+    def _start(self):
+        lib = _load_libc()
+        fd = lib.inotify_init1(IN_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._fd = fd
+        self._thread = threading.Thread(
+            target=self._run, name="zuu-inotify", daemon=True
+        )
+        self._thread.start()
+
+    def watch(self, path: str) -> bool:
+        """
+        Start watching a file.
+
+        Args:
+            path (str): The file to watch.
+
+        Returns:
+            bool: True if the file is now watched, False if the watch could not be added.
+        """
+        path = os.path.abspath(path)
+        directory, name = os.path.split(path)
+        with self._lock:
+            if path in self.changes:
+                return True
+            try:
+                if self._fd is None:
+                    self._start()
+                wd = self._wd_by_dir.get(directory)
+                if wd is None:
+                    wd = _libc.inotify_add_watch(
+                        self._fd, os.fsencode(directory), WATCH_MASK
+                    )
+                    if wd < 0:
+                        return False
+                    self._wd_by_dir[directory] = wd
+                    self._dir_by_wd[wd] = directory
+                    self._files_by_dir[directory] = set()
+            except OSError:
+                return False
+
+            self._files_by_dir[directory].add(name)
+            self.changes[path] = next(self._sequence)
+        return True
+
+    def unwatch(self, path: str) -> None:
+        """
+        Stop watching a file. The directory watch is removed with its last file.
+        """
+        path = os.path.abspath(path)
+        directory, name = os.path.split(path)
+        with self._lock:
+            self.changes.pop(path, None)
+            files = self._files_by_dir.get(directory)
+            if files is None:
+                return
+            files.discard(name)
+            if not files:
+                wd = self._wd_by_dir.pop(directory)
+                del self._dir_by_wd[wd]
+                del self._files_by_dir[directory]
+                _libc.inotify_rm_watch(self._fd, wd)
+
+    def _run(self):
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except InterruptedError:
+                continue
+            except OSError:
+                return
+            self._handle(data)
+
+    def _handle(self, data: bytes):
+        offset = 0
+        with self._lock:
+            while offset < len(data):
+                wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset : offset + length].rstrip(b"\0")
+                offset += length
+
+                if mask & IN_Q_OVERFLOW:
+                    # events were dropped, nothing can be trusted
+                    for path in self.changes:
+                        self.changes[path] = next(self._sequence)
+                    continue
+
+                directory = self._dir_by_wd.get(wd)
+                if directory is None:
+                    continue
+
+                if mask & (IN_IGNORED | IN_DELETE_SELF | IN_MOVE_SELF):
+                    # the directory itself is gone, hand its files back to polling
+                    for file in self._files_by_dir.pop(directory, ()):
+                        self.changes.pop(os.path.join(directory, file), None)
+                    self._wd_by_dir.pop(directory, None)
+                    self._dir_by_wd.pop(wd, None)
+                    continue
+
+                path = os.path.join(directory, os.fsdecode(name))
+                if path in self.changes:
+                    self.changes[path] = next(self._sequence)
@@ -1,8 +1,12 @@
 import os
 import stat
 import functools
+import threading
 
-__all__ = ["has_hidden_attribute", "preserve_cwd"]
+__all__ = ["has_hidden_attribute", "preserve_cwd", "CWD_LOCK"]
+
+# the working directory is process-wide, code that changes it should hold this lock
+CWD_LOCK = threading.RLock()
 
 
 def has_hidden_attribute(filepath):
@@ -19,12 +23,20 @@ def has_hidden_attribute(filepath):
 
 
 def preserve_cwd(func):
+    """
+    Restores the working directory after the function returns.
+
+    The call holds `CWD_LOCK`, so functions that change directory do not interleave across
+    threads. Prefer passing `cwd=` to subprocesses where possible, which needs no lock.
+    """
+
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        original_cwd = os.getcwd()
-        try:
-            return func(*args, **kwargs)
-        finally:
-            os.chdir(original_cwd)
+        with CWD_LOCK:
+            original_cwd = os.getcwd()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                os.chdir(original_cwd)
 
     return wrapper
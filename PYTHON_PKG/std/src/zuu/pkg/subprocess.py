@@ -1,6 +1,8 @@
+import asyncio
 import json
 import subprocess
 import platform
+import typing
 
 __all__ = [
     "execute",
@@ -8,6 +10,12 @@ __all__ = [
     "query_bytes",
     "query_string",
     "query_json",
+    "aquery_bytes",
+    "aquery_string",
+    "aquery_json",
+    "aquery_many",
+    "aquery_as_completed",
+    "query_many",
 ]
 
 
@@ -186,3 +194,188 @@ def query_json(
         dict: The parsed JSON data from the subprocess output.
     """
     return json.loads(query_string(path, *args, timeout=timeout))
+
+
+async def aquery_bytes(
+    path: str,
+    *args,
+    timeout: int = None,
+):
+    """
+    Async `query_bytes`, built on `asyncio.create_subprocess_exec`.
+
+    Raises:
+        subprocess.TimeoutExpired: If the subprocess takes longer than the timeout. The process is killed first.
+
+    Returns:
+        bytes: The captured output of the subprocess.
+
+    If the awaiting task is cancelled, the process is killed and reaped before the cancellation propagates.
+    """
+    timeout = timeout or DEFAULT_QUERY_TIMEOUT
+    command = [path, *(str(arg) for arg in args)]
+    proc = await asyncio.create_subprocess_exec(
+        *command,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        stdout, _ = await asyncio.wait_for(proc.communicate(), timeout)
+    except asyncio.TimeoutError:
+        await _kill(proc)
+        raise subprocess.TimeoutExpired(command, timeout) from None
+    except asyncio.CancelledError:
+        await _kill(proc)
+        raise
+    return stdout
+
+
+async def _kill(proc):
+    if proc.returncode is None:
+        try:
+            proc.kill()
+        except ProcessLookupError:
+            pass
+    # drain the pipes so their transports close while the loop is still running,
+    # finishing the drain even if this task is cancelled meanwhile
+    drain = asyncio.ensure_future(proc.communicate())
+    cancelled = False
+    while not drain.done():
+        try:
+            await asyncio.shield(drain)
+        except asyncio.CancelledError:
+            cancelled = True
+    if cancelled:
+        drain.exception()
+        raise asyncio.CancelledError
+
+
+async def aquery_string(path: str, *args, timeout: int = None, strip: bool = False):
+    """
+    Async `query_string`.
+    """
+    raw = await aquery_bytes(path, *args, timeout=timeout)
+    return raw.decode("utf-8").strip() if strip else raw.decode("utf-8")
+
+
+async def aquery_json(
+    path: str,
+    *args,
+    timeout: int = None,
+):
+    """
+    Async `query_json`.
+    """
+    return json.loads(await aquery_string(path, *args, timeout=timeout))
+
+
+_QUERIES = {"bytes": aquery_bytes, "string": aquery_string, "json": aquery_json}
+
+
+def _query_tasks(commands, max_concurrency: int, timeout: int, output: str, return_exceptions: bool):
+    if output not in _QUERIES:
+        raise ValueError(f"output must be one of {tuple(_QUERIES)}")
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+    query = _QUERIES[output]
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run(index, command):
+        async with semaphore:
+            try:
+                return index, await query(*command, timeout=timeout)
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                return index, e
+
+    return [asyncio.ensure_future(run(i, command)) for i, command in enumerate(commands)]
+
+
+async def _cancel(tasks):
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def aquery_many(
+    commands: typing.Iterable[typing.Sequence],
+    max_concurrency: int = 8,
+    timeout: int = None,
+    output: str = "bytes",
+    return_exceptions: bool = False,
+) -> list:
+    """
+    Runs many queries with at most `max_concurrency` processes alive at once.
+
+    Args:
+        commands (typing.Iterable[typing.Sequence]): Each command is `[path, *args]`.
+        max_concurrency (int, optional): Maximum number of concurrent processes. Defaults to 8.
+        timeout (int, optional): Per-command timeout, see `query_bytes`.
+        output (str, optional): "bytes", "string" or "json", picking the matching `aquery_*`. Defaults to "bytes".
+        return_exceptions (bool, optional): Put a failing command's exception in its result slot
+            instead of raising it. Defaults to False.
+
+    Returns:
+        list: The results, in the order of `commands`.
+
+    When a command fails (without `return_exceptions`) or the caller is cancelled, the remaining
+    commands are cancelled and their processes killed before returning.
+    """
+    tasks = _query_tasks(commands, max_concurrency, timeout, output, return_exceptions)
+    try:
+        results = await asyncio.gather(*tasks)
+    finally:
+        await _cancel([t for t in tasks if not t.done()])
+    return [result for _, result in results]
+
+
+async def aquery_as_completed(
+    commands: typing.Iterable[typing.Sequence],
+    max_concurrency: int = 8,
+    timeout: int = None,
+    output: str = "bytes",
+    return_exceptions: bool = False,
+) -> typing.AsyncIterator[typing.Tuple[int, typing.Any]]:
+    """
+    Like `aquery_many`, but yields `(index, result)` pairs as the commands finish.
+
+    Leaving the loop early cancels the commands that are still pending.
+    """
+    tasks = _query_tasks(commands, max_concurrency, timeout, output, return_exceptions)
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        await _cancel([t for t in tasks if not t.done()])
+
+
+def query_many(
+    commands: typing.Iterable[typing.Sequence],
+    max_concurrency: int = 8,
+    timeout: int = None,
+    output: str = "bytes",
+    return_exceptions: bool = False,
+    ordered: bool = True,
+) -> list:
+    """
+    Blocking wrapper around `aquery_many` / `aquery_as_completed`, running its own event loop.
+
+    Returns:
+        list: The results in the order of `commands`, or, with `ordered=False`, `(index, result)`
+        pairs in completion order.
+    """
+    if ordered:
+        return asyncio.run(
+            aquery_many(commands, max_concurrency, timeout, output, return_exceptions)
+        )
+
+    async def collect():
+        return [
+            pair
+            async for pair in aquery_as_completed(
+                commands, max_concurrency, timeout, output, return_exceptions
+            )
+        ]
+
+    return asyncio.run(collect())
@@ -1,4 +1,11 @@
+import datetime
+import heapq
+import itertools
+import sys
+import threading
 import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import Executor, ThreadPoolExecutor
 from functools import wraps
 
 __all__ = [
@@ -7,6 +14,13 @@ __all__ = [
     "unix_timestamp",
     "timely_cls_property",
     "timely_property",
+    "TimelyProperty",
+    "TimelyClsProperty",
+    "invalidate_property",
+    "ttl_cache",
+    "CronSpec",
+    "Job",
+    "Scheduler",
 ]
 
 
@@ -74,15 +88,146 @@ def unix_timestamp():
     return int(time.time() * 1000)
 
 
-def timely_property(expiration_seconds):
+class _TimelyEntry:
+    __slots__ = ("value", "expires", "has_value", "refreshing", "lock")
+
+    def __init__(self):
+        self.value = None
+        self.expires = 0.0
+        self.has_value = False
+        self.refreshing = False
+        self.lock = threading.Lock()
+
+
+class _TimelyBase:
+    """
+    Shared expiry logic of `TimelyProperty` and `TimelyClsProperty`.
+
+    Each cached value has its own lock, so when it expires a single caller recomputes it
+    while the others wait for that result. With `stale_while_revalidate`, callers within that
+    many seconds past expiry get the old value immediately and the refresh runs on a background
+    thread. With `refresh_ahead`, a background refresh starts that many seconds before expiry.
+    """
+
+    def __init__(
+        self,
+        func,
+        expiration_seconds: float,
+        stale_while_revalidate: float = 0,
+        refresh_ahead: float = 0,
+    ):
+        if expiration_seconds < 0:
+            raise ValueError("expiration_seconds must be greater than 0")
+        self.func = func
+        self.expiration_seconds = expiration_seconds
+        self.stale_while_revalidate = stale_while_revalidate
+        self.refresh_ahead = refresh_ahead
+        self._lock = threading.Lock()
+        wraps(func)(self)
+
+    def _compute(self, entry: _TimelyEntry, target):
+        value = self.func(target)
+        entry.value = value
+        entry.expires = time.monotonic() + self.expiration_seconds
+        entry.has_value = True
+        return value
+
+    def _refresh(self, entry: _TimelyEntry, target):
+        try:
+            with entry.lock:
+                if time.monotonic() < entry.expires - self.refresh_ahead:
+                    return
+                self._compute(entry, target)
+        except Exception:
+            # the stale value stays expired, the next blocking read recomputes and raises
+            pass
+        finally:
+            entry.refreshing = False
+
+    def _start_refresh(self, entry: _TimelyEntry, target):
+        with self._lock:
+            if entry.refreshing:
+                return
+            entry.refreshing = True
+        threading.Thread(
+            target=self._refresh, args=(entry, target), name="zuu-timely-refresh", daemon=True
+        ).start()
+
+    def _read(self, entry: _TimelyEntry, target):
+        if self.expiration_seconds == 0:
+            return self.func(target)
+
+        now = time.monotonic()
+        if entry.has_value:
+            if now < entry.expires:
+                if self.refresh_ahead and now >= entry.expires - self.refresh_ahead:
+                    self._start_refresh(entry, target)
+                return entry.value
+            if now < entry.expires + self.stale_while_revalidate:
+                self._start_refresh(entry, target)
+                return entry.value
+
+        with entry.lock:
+            # whoever held the lock may have just refreshed it
+            if entry.has_value and time.monotonic() < entry.expires:
+                return entry.value
+            return self._compute(entry, target)
+
+    def _expire(self, entry: _TimelyEntry):
+        entry.expires = 0.0
+        entry.has_value = False
+
+
+class TimelyProperty(_TimelyBase):
+    """
+    A read-only property that caches its value per instance for `expiration_seconds`.
+
+    The cache entry lives in the instance's `__dict__`, so it is dropped with the instance.
+    See `_TimelyBase` for the locking and background refresh behaviour.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._attr = f"__{self.func.__name__}_timely"
+
+    def __set_name__(self, owner, name):
+        self._attr = f"__{name}_timely"
+
+    def _entry(self, instance) -> _TimelyEntry:
+        entry = instance.__dict__.get(self._attr)
+        if entry is None:
+            with self._lock:
+                entry = instance.__dict__.setdefault(self._attr, _TimelyEntry())
+        return entry
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        return self._read(self._entry(instance), instance)
+
+    def __set__(self, instance, value):
+        raise AttributeError("can't set attribute")
+
+    def invalidate(self, instance):
+        """
+        Drops the cached value of one instance; the next read recomputes it.
+        """
+        self._expire(self._entry(instance))
+
+
+def timely_property(
+    expiration_seconds,
+    stale_while_revalidate: float = 0,
+    refresh_ahead: float = 0,
+):
     """
     A decorator that creates a property that caches the result of a function call for a specified expiration time.
 
     The `timely_property` decorator takes an `expiration_seconds` argument, which specifies the number of seconds to cache the result of the decorated function. If `expiration_seconds` is 0, the cache is disabled and the function is called every time the property is accessed.
 
-    When the property is accessed, the decorator checks if the cached value is still valid (i.e., the expiration time has not been reached). If the cached value is valid, it is returned. Otherwise, the function is called, the result is cached, and the new value is returned.
+    When the property is accessed, the decorator checks if the cached value is still valid (i.e., the expiration time has not been reached). If the cached value is valid, it is returned. Otherwise, the function is called, the result is cached, and the new value is returned. Concurrent readers of an expired value wait for a single recomputation instead of each calling the function.
 
-    The decorator uses private attributes on the object to store the cached value and the timestamp of the last update. These attributes are named `__<function_name>_value` and `__<function_name>_timestamp`, respectively.
+    `stale_while_revalidate` serves the expired value for that many more seconds while it is recomputed in the background, and `refresh_ahead` starts that background recomputation that many seconds before expiry. `Cls.prop.invalidate(obj)` drops a cached value.
 
     The `timely_property` decorator can be used on any instance method of a class.
     """
@@ -90,62 +235,493 @@ def timely_property(expiration_seconds):
         raise ValueError("expiration_seconds must be greater than 0")
 
     def decorator(func):
-        @wraps(func)
-        def wrapper(self):
-            if not hasattr(self, f"__{func.__name__}_value"):
-                setattr(self, f"__{func.__name__}_value", None)
-                setattr(self, f"__{func.__name__}_timestamp", 0)
-
-            current_time = time.time()
-            if (
-                expiration_seconds == 0
-                or current_time - getattr(self, f"__{func.__name__}_timestamp")
-                >= expiration_seconds
-            ):
-                value = func(self)
-                setattr(self, f"__{func.__name__}_value", value)
-                setattr(self, f"__{func.__name__}_timestamp", current_time)
-
-            return getattr(self, f"__{func.__name__}_value")
-
-        return property(wrapper)
+        return TimelyProperty(func, expiration_seconds, stale_while_revalidate, refresh_ahead)
 
     return decorator
 
 
-class TimelyClsProperty:
+class TimelyClsProperty(_TimelyBase):
     """
     A class that provides a class-level property that caches the result of a function call for a specified expiration time.
 
     The `TimelyClsProperty` class is a descriptor that can be used to create a class-level property. When the property is accessed, the descriptor checks if the cached value is still valid (i.e., the expiration time has not been reached). If the cached value is valid, it is returned. Otherwise, the function is called, the result is cached, and the new value is returned.
 
-    The class uses a dictionary `self.cache` to store the cached values, where the key is the class object and the value is a dictionary containing the cached value and the expiration time.
+    The class uses a dictionary `self.cache` to store the cached entries, where the key is the class object. See `_TimelyBase` for the locking and background refresh behaviour.
 
     """
 
-    def __init__(self, func, expiration_seconds):
-        self.func = func
-        self.expiration_seconds = expiration_seconds
+    def __init__(
+        self,
+        func,
+        expiration_seconds,
+        stale_while_revalidate: float = 0,
+        refresh_ahead: float = 0,
+    ):
+        super().__init__(func, expiration_seconds, stale_while_revalidate, refresh_ahead)
         self.cache = {}
 
+    def _entry(self, owner) -> _TimelyEntry:
+        entry = self.cache.get(owner)
+        if entry is None:
+            with self._lock:
+                entry = self.cache.setdefault(owner, _TimelyEntry())
+        return entry
+
     def __get__(self, instance, owner):
-        current_time = time.time()
-        cache_entry = self.cache.get(owner)
+        return self._read(self._entry(owner), owner)
+
+    def invalidate(self, owner=None):
+        """
+        Drops the cached value of one class, or of all classes when `owner` is None.
+        """
+        if owner is None:
+            with self._lock:
+                self.cache.clear()
+        else:
+            self._expire(self._entry(owner))
+
+
+def timely_cls_property(
+    expiration_seconds,
+    stale_while_revalidate: float = 0,
+    refresh_ahead: float = 0,
+):
+    def decorator(func):
+        prop = TimelyClsProperty(func, expiration_seconds, stale_while_revalidate, refresh_ahead)
+        return prop
 
-        if cache_entry and (current_time < cache_entry["expire_time"]):
-            return cache_entry["value"]
+    return decorator
 
-        value = self.func(owner)
-        self.cache[owner] = {
-            "value": value,
-            "expire_time": current_time + self.expiration_seconds,
-        }
-        return value
 
+def invalidate_property(target, name: str):
+    """
+    Drops the cached value of a timely property or class property.
+
+    Args:
+        target: The instance (for `timely_property`) or class (for `timely_cls_property`).
+        name (str): The property name.
+    """
+    owner = target if isinstance(target, type) else type(target)
+    for klass in owner.__mro__:
+        prop = klass.__dict__.get(name)
+        if isinstance(prop, _TimelyBase):
+            prop.invalidate(target)
+            return
+    raise AttributeError(f"{owner.__name__} has no timely property {name!r}")
+
+
+CacheInfo = namedtuple(
+    "CacheInfo",
+    ["hits", "misses", "evictions", "expirations", "maxsize", "currsize", "currbytes"],
+)
+
+_KWD_MARK = object()
+
+
+def _make_key(args, kwargs, typed: bool):
+    key = args
+    if kwargs:
+        key += (_KWD_MARK,) + tuple(kwargs.items())
+    if typed:
+        key += tuple(type(v) for v in args)
+        if kwargs:
+            key += tuple(type(v) for v in kwargs.values())
+    return key
+
+
+def ttl_cache(
+    maxsize: int = 128,
+    ttl: float = 600,
+    maxbytes: int = None,
+    typed: bool = False,
+    sizeof=sys.getsizeof,
+):
+    """
+    A memoizing decorator whose entries expire after `ttl` seconds and are evicted least recently used first.
+
+    Args:
+        maxsize (int, optional): Maximum number of entries, None for no limit. Defaults to 128.
+        ttl (float, optional): Seconds an entry stays valid, None to never expire. Defaults to 600.
+        maxbytes (int, optional): Maximum total size of the cached values as measured by `sizeof`.
+            A value larger than the whole budget is returned without being cached.
+        typed (bool, optional): Cache arguments of different types separately, like `functools.lru_cache`.
+        sizeof (callable, optional): Measures a value for `maxbytes`. Defaults to `sys.getsizeof`,
+            which is shallow; pass a deep measure for nested values.
+
+    The wrapper exposes `cache_info()` (hits, misses, evictions, expirations, maxsize, currsize,
+    currbytes), `cache_clear()` and `cache_parameters()`. It is safe to call from several threads;
+    the wrapped function itself runs outside the lock.
+    """
+    if callable(maxsize):
+        # bare @ttl_cache
+        return ttl_cache()(maxsize)
+    if maxsize is not None and maxsize < 0:
+        maxsize = 0
 
-def timely_cls_property(expiration_seconds):
     def decorator(func):
-        prop = TimelyClsProperty(func, expiration_seconds)
-        return prop
+        data = OrderedDict()
+        lock = threading.Lock()
+        stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "bytes": 0}
+
+        def _drop(key):
+            _, _, size = data.pop(key)
+            stats["bytes"] -= size
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = _make_key(args, kwargs, typed)
+            now = time.monotonic()
+            with lock:
+                entry = data.get(key)
+                if entry is not None:
+                    if entry[0] is None or now < entry[0]:
+                        data.move_to_end(key)
+                        stats["hits"] += 1
+                        return entry[1]
+                    _drop(key)
+                    stats["expirations"] += 1
+                stats["misses"] += 1
+
+            value = func(*args, **kwargs)
+            if maxsize == 0:
+                return value
+            size = sizeof(value) if maxbytes is not None else 0
+            if maxbytes is not None and size > maxbytes:
+                return value
+
+            expires = None if ttl is None else time.monotonic() + ttl
+            with lock:
+                if key in data:
+                    _drop(key)
+                data[key] = (expires, value, size)
+                stats["bytes"] += size
+                # the oldest entry is also the likeliest to have expired
+                while data:
+                    oldest = next(iter(data))
+                    oldest_expires = data[oldest][0]
+                    if oldest_expires is not None and oldest_expires <= now:
+                        _drop(oldest)
+                        stats["expirations"] += 1
+                    elif (maxsize is not None and len(data) > maxsize) or (
+                        maxbytes is not None and stats["bytes"] > maxbytes
+                    ):
+                        _drop(oldest)
+                        stats["evictions"] += 1
+                    else:
+                        break
+            return value
+
+        def cache_info() -> CacheInfo:
+            with lock:
+                return CacheInfo(
+                    stats["hits"],
+                    stats["misses"],
+                    stats["evictions"],
+                    stats["expirations"],
+                    maxsize,
+                    len(data),
+                    stats["bytes"],
+                )
+
+        def cache_clear():
+            with lock:
+                data.clear()
+                for name in stats:
+                    stats[name] = 0
+
+        def cache_parameters() -> dict:
+            return {"maxsize": maxsize, "ttl": ttl, "maxbytes": maxbytes, "typed": typed}
+
+        wrapper.cache_info = cache_info
+        wrapper.cache_clear = cache_clear
+        wrapper.cache_parameters = cache_parameters
+        return wrapper
 
     return decorator
+
+
+# day of week accepts 7 as a second Sunday
+_CRON_RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+
+def _parse_cron_field(field: str, low: int, high: int) -> frozenset:
+    values = set()
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, step = part.split("/")
+            step = int(step)
+            if step < 1:
+                raise ValueError(f"invalid cron step in {field!r}")
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (int(v) for v in part.split("-"))
+        else:
+            start = int(part)
+            end = high if step > 1 else start
+        if not (low <= start <= end <= high):
+            raise ValueError(f"cron field {field!r} out of range {low}-{high}")
+        values.update(range(start, end + 1, step))
+    if high == 7 and 7 in values:
+        values.discard(7)
+        values.add(0)
+    return frozenset(values)
+
+
+class CronSpec:
+    """
+    A five field cron expression: minute, hour, day of month, month, day of week (0 or 7 is Sunday).
+
+    Fields accept `*`, numbers, ranges `a-b`, steps `*/n` or `a-b/n` and lists `a,b`. As in cron,
+    when both day fields are restricted a day matching either one fires.
+    """
+
+    def __init__(self, expr: str):
+        fields = expr.split()
+        if len(fields) != 5:
+            raise ValueError(f"cron expression needs 5 fields, got {expr!r}")
+        self.expr = expr
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            _parse_cron_field(f, *r) for f, r in zip(fields, _CRON_RANGES)
+        )
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    def _day_matches(self, dt: datetime.datetime) -> bool:
+        day = dt.day in self.days
+        # datetime counts Monday as 0, cron counts Sunday as 0
+        weekday = (dt.weekday() + 1) % 7 in self.weekdays
+        if self._any_day:
+            return weekday
+        if self._any_weekday:
+            return day
+        return day or weekday
+
+    def next_after(self, after: datetime.datetime) -> datetime.datetime:
+        """
+        The first matching minute strictly after `after`.
+        """
+        dt = after.replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+        limit = dt.year + 5
+        while dt.year <= limit:
+            if dt.month not in self.months:
+                dt = (dt.replace(day=1, hour=0, minute=0) + datetime.timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(dt):
+                dt = dt.replace(hour=0, minute=0) + datetime.timedelta(days=1)
+            elif dt.hour not in self.hours:
+                dt = dt.replace(minute=0) + datetime.timedelta(hours=1)
+            elif dt.minute not in self.minutes:
+                dt += datetime.timedelta(minutes=1)
+            else:
+                return dt
+        raise ValueError(f"cron expression {self.expr!r} never fires")
+
+    def __repr__(self):
+        return f"CronSpec({self.expr!r})"
+
+
+class Job:
+    """
+    A job registered with a `Scheduler`. `lateness` is how late its last run was dispatched, in seconds.
+    """
+
+    def __init__(self, func, args, kwargs, interval: float = None, cron: CronSpec = None):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.interval = interval
+        self.cron = cron
+        self.due = 0.0
+        self.runs = 0
+        self.skipped = 0
+        self.errors = 0
+        self.last_error = None
+        self.lateness = 0.0
+        self.cancelled = False
+        self._future = None
+
+    def cancel(self):
+        self.cancelled = True
+
+    def _next_due(self, now: float):
+        """
+        The next monotonic due time after a run, or None for one-shot jobs.
+        """
+        if self.interval is not None:
+            due = self.due + self.interval
+            if due <= now:
+                # fell behind, skip the missed slots instead of firing them back to back
+                missed = int((now - self.due) // self.interval)
+                due = self.due + self.interval * (missed + 1)
+            return due
+        if self.cron is not None:
+            return _cron_due(self.cron)
+        return None
+
+    def __repr__(self):
+        name = getattr(self.func, "__name__", repr(self.func))
+        return f"<Job {name} runs={self.runs} cancelled={self.cancelled}>"
+
+
+def _cron_due(cron: CronSpec) -> float:
+    now = datetime.datetime.now()
+    return time.monotonic() + (cron.next_after(now) - now).total_seconds()
+
+
+class Scheduler:
+    """
+    Runs many timed jobs from a single timing thread.
+
+    Jobs are kept in a heap ordered by due time; the timing thread sleeps until the earliest one,
+    then hands it to an executor, so thousands of jobs cost one thread plus the worker pool.
+    A repeating job whose previous run is still going is skipped for that slot rather than
+    stacked up.
+
+    Args:
+        max_workers (int, optional): Size of the worker pool created when no executor is given.
+        executor (Executor, optional): Where job functions run. It is not shut down by `shutdown`.
+    """
+
+    def __init__(self, max_workers: int = None, executor: Executor = None):
+        self._own_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="zuu-scheduler-worker"
+        )
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopped = False
+        self.dispatched = 0
+        self.skipped = 0
+        self.max_lateness = 0.0
+        self._total_lateness = 0.0
+
+    def _push(self, job: Job, due: float) -> Job:
+        job.due = due
+        with self._cond:
+            if self._stopped:
+                raise RuntimeError("scheduler is shut down")
+            heapq.heappush(self._heap, (due, next(self._seq), job))
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="zuu-scheduler", daemon=True
+                )
+                self._thread.start()
+            self._cond.notify()
+        return job
+
+    def at(self, when: str | int, func, *args, **kwargs) -> Job:
+        """
+        Run once at a time understood by `remaining_time` ("10:25pm", "21:24", or seconds from now).
+        """
+        remaining = remaining_time(when)
+        if remaining is None:
+            raise ValueError("time has already passed")
+        return self._push(Job(func, args, kwargs), time.monotonic() + remaining)
+
+    def every(self, seconds: float, func, *args, start: str | int = None, **kwargs) -> Job:
+        """
+        Run every `seconds`, first after one interval or at `start` (any `remaining_time` value).
+        Slots missed while the scheduler was behind are skipped, not replayed.
+        """
+        if seconds <= 0:
+            raise ValueError("interval must be positive")
+        delay = seconds
+        if start is not None:
+            delay = remaining_time(start)
+            if delay is None:
+                raise ValueError("time has already passed")
+        return self._push(Job(func, args, kwargs, interval=seconds), time.monotonic() + delay)
+
+    def cron(self, expr: str, func, *args, **kwargs) -> Job:
+        """
+        Run on a cron schedule, see `CronSpec`. Times are local wall-clock minutes.
+        """
+        spec = CronSpec(expr)
+        return self._push(Job(func, args, kwargs, cron=spec), _cron_due(spec))
+
+    def cancel(self, job: Job):
+        # cancelled jobs are dropped when they reach the top of the heap
+        job.cancel()
+
+    def __len__(self):
+        with self._cond:
+            return sum(1 for _, _, job in self._heap if not job.cancelled)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopped:
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    delay = self._heap[0][0] - time.monotonic()
+                    if delay <= 0:
+                        break
+                    self._cond.wait(delay)
+                if self._stopped:
+                    return
+                due, _, job = heapq.heappop(self._heap)
+            if not job.cancelled:
+                self._dispatch(job, due)
+
+    def _dispatch(self, job: Job, due: float):
+        now = time.monotonic()
+        if job._future is not None and not job._future.done():
+            job.skipped += 1
+            self.skipped += 1
+        else:
+            lateness = now - due
+            job.lateness = lateness
+            job.runs += 1
+            self.dispatched += 1
+            self._total_lateness += lateness
+            self.max_lateness = max(self.max_lateness, lateness)
+            job._future = self._executor.submit(job.func, *job.args, **job.kwargs)
+            job._future.add_done_callback(lambda f: self._record(job, f))
+
+        next_due = job._next_due(now)
+        if next_due is not None and not job.cancelled:
+            try:
+                self._push(job, next_due)
+            except RuntimeError:
+                pass
+
+    @staticmethod
+    def _record(job: Job, future):
+        if not future.cancelled() and future.exception() is not None:
+            job.errors += 1
+            job.last_error = future.exception()
+
+    def stats(self) -> dict:
+        """
+        Dispatch counters and lateness (seconds between a job's due time and its dispatch).
+        """
+        return {
+            "pending": len(self),
+            "dispatched": self.dispatched,
+            "skipped": self.skipped,
+            "max_lateness": self.max_lateness,
+            "mean_lateness": self._total_lateness / self.dispatched if self.dispatched else 0.0,
+        }
+
+    def shutdown(self, wait: bool = True):
+        """
+        Stops the timing thread; pending jobs are dropped. With `wait`, running jobs are awaited.
+        """
+        with self._cond:
+            self._stopped = True
+            self._heap.clear()
+            self._cond.notify()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        if self._own_executor:
+            self._executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
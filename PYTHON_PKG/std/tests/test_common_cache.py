@@ -0,0 +1,172 @@
+import multiprocessing
+import os
+import subprocess
+import sys
+import threading
+import time
+import pytest
+from zuu.common.cache import DiskCache, _memo_key, disk_memo
+
+
+def _writer(path, n):
+    cache = DiskCache(path)
+    for i in range(50):
+        cache.set(f"{n}-{i}", i)
+
+
+class TestDiskCache:
+    def test_persists_across_instances(self, tmp_path):
+        path = str(tmp_path / "memo.sqlite3")
+        DiskCache(path).set("k", {"a": [1, 2]})
+        assert DiskCache(path).get("k") == {"a": [1, 2]}
+
+    def test_ttl(self, tmp_path):
+        cache = DiskCache(str(tmp_path / "memo.sqlite3"))
+        cache.set("k", 1, ttl=0.05)
+        assert cache.get("k") == 1
+        time.sleep(0.06)
+        assert cache.get("k", "gone") == "gone"
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_lru_eviction_by_size(self, tmp_path):
+        cache = DiskCache(str(tmp_path / "memo.sqlite3"), max_bytes=250)
+        cache.set("a", b"x" * 100)
+        time.sleep(0.01)
+        cache.set("b", b"x" * 100)
+        time.sleep(0.01)
+        cache.get("a")
+        cache.set("c", b"x" * 100)
+        assert cache.get("b") is None
+        assert cache.get("a") is not None and cache.get("c") is not None
+        assert cache.stats()["bytes"] <= 250
+        cache.set("huge", b"x" * 1000)
+        assert cache.get("huge") is None
+
+    def test_running_total(self, tmp_path):
+        cache = DiskCache(str(tmp_path / "memo.sqlite3"), max_bytes=1000)
+        statements = []
+        cache._connection().set_trace_callback(statements.append)
+        cache.set("a", b"x" * 100)
+        cache.set("a", b"x" * 10)
+        cache.set("b", b"x" * 200)
+        cache.delete("b")
+        assert not any("SUM(" in statement for statement in statements)
+        conn = cache._connection()
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        assert cache.stats()["bytes"] == total
+        cache.clear()
+        assert cache.stats()["bytes"] == 0
+
+    @pytest.mark.skipif(sys.platform != "linux", reason="relies on fork start method")
+    def test_multi_process_writers(self, tmp_path):
+        path = str(tmp_path / "memo.sqlite3")
+        DiskCache(path)
+        procs = [multiprocessing.Process(target=_writer, args=(path, n)) for n in range(4)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join(30)
+            assert p.exitcode == 0
+        cache = DiskCache(path)
+        assert cache.stats()["entries"] == 200
+        assert cache.get("3-49") == 49
+
+
+class TestDiskMemo:
+    def test_memoizes_and_clears(self, tmp_path):
+        calls = []
+
+        @disk_memo(path=str(tmp_path / "memo.sqlite3"))
+        def add(a, b=0):
+            calls.append((a, b))
+            return None if a == 0 else a + b
+
+        assert add(1, b=2) == 3 and add(1, b=2) == 3
+        assert add(0) is None and add(0) is None
+        assert calls == [(1, 2), (0, 0)]
+        add.cache_clear()
+        add(1, b=2)
+        assert len(calls) == 3
+
+    def test_survives_new_wrapper(self, tmp_path):
+        cache = DiskCache(str(tmp_path / "memo.sqlite3"))
+        calls = []
+
+        def compute(x):
+            calls.append(x)
+            return x * 2
+
+        assert disk_memo(cache=cache)(compute)(4) == 8
+        assert disk_memo(cache=DiskCache(cache.path))(compute)(4) == 8
+        assert calls == [4]
+
+    def test_ttl(self, tmp_path):
+        calls = []
+
+        @disk_memo(ttl=0.05, path=str(tmp_path / "memo.sqlite3"))
+        def now():
+            calls.append(1)
+            return len(calls)
+
+        assert now() == 1 and now() == 1
+        time.sleep(0.06)
+        assert now() == 2
+
+    def test_unserializable_result_is_returned_uncached(self, tmp_path):
+        calls = []
+
+        @disk_memo(path=str(tmp_path / "memo.sqlite3"))
+        def make_lock():
+            calls.append(1)
+            return threading.Lock()
+
+        assert make_lock() is not None and make_lock() is not None
+        assert len(calls) == 2
+        assert make_lock.cache.stats()["entries"] == 0
+
+    def test_orjson_unserializable_result(self, tmp_path):
+        pytest.importorskip("orjson")
+
+        @disk_memo(path=str(tmp_path / "memo.sqlite3"), serializer="orjson")
+        def members():
+            return {1, 2}
+
+        assert members() == {1, 2}
+
+    def test_orjson_serializer(self, tmp_path):
+        pytest.importorskip("orjson")
+        cache = DiskCache(str(tmp_path / "memo.sqlite3"), serializer="orjson")
+        cache.set("k", {"a": [1, 2.5, None]})
+        assert cache.get("k") == {"a": [1, 2.5, None]}
+
+
+class TestMemoKeys:
+    def test_stable_across_hash_seeds(self):
+        code = (
+            "from zuu.common.cache import _memo_key;"
+            "print(_memo_key(({'alpha', 'beta', 'gamma', 'delta'}, frozenset('xyzw')),"
+            " {'d': {'k2': {'q', 'r'}, 'k1': 1}}))"
+        )
+        digests = {
+            subprocess.run(
+                [sys.executable, "-c", code],
+                capture_output=True,
+                text=True,
+                check=True,
+                env={**os.environ, "PYTHONHASHSEED": seed, "PYTHONPATH": os.pathsep.join(sys.path)},
+            ).stdout
+            for seed in ("1", "2", "3")
+        }
+        assert len(digests) == 1
+
+    def test_types_are_distinguished(self):
+        assert _memo_key((1,), {}) != _memo_key((True,), {})
+        assert _memo_key(([1],), {}) != _memo_key(((1,),), {})
+        assert _memo_key((), {"a": 1, "b": 2}) == _memo_key((), {"b": 2, "a": 1})
+
+    def test_unreadable_row_is_a_miss(self, tmp_path):
+        cache = DiskCache(str(tmp_path / "memo.sqlite3"))
+        cache.set("k", 1)
+        cache._connection().execute("UPDATE entries SET value = ? WHERE key = 'k'", (b"garbage",))
+        assert cache.get("k", "missing") == "missing"
+        assert cache.stats()["entries"] == 0
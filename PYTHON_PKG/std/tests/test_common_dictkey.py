@@ -1,3 +1,8 @@
+import json
+import math
+import copy
+import pickle
+import pytest
 from zuu.common.dictKey import DictKeysDict, FrozenDict
 
 class TestDictKeysDict:
@@ -54,3 +59,221 @@ class TestDictKeysDict:
         loaded = DictKeysDict.loadJson(json_str)
         assert isinstance(loaded, DictKeysDict)
         assert loaded[FrozenDict({"a": 1})][1][FrozenDict({"c": 3})] == "nested"
+
+
+class TestFrozenDict:
+    def test_hash_is_order_independent(self):
+        assert hash(FrozenDict({"a": 1, "b": 2})) == hash(FrozenDict({"b": 2, "a": 1}))
+        assert FrozenDict({"a": 1, "b": 2}) == FrozenDict(b=2, a=1)
+
+    def test_hash_is_cached(self):
+        key = FrozenDict({"a": 1})
+        assert key._hash is None
+        h = hash(key)
+        assert key._hash == h
+
+    def test_mutation_is_blocked(self):
+        key = FrozenDict({"a": 1})
+        with pytest.raises(NotImplementedError):
+            key["b"] = 2
+        with pytest.raises(NotImplementedError):
+            key.update({"b": 2})
+        with pytest.raises(NotImplementedError):
+            key.pop("a")
+        with pytest.raises(AttributeError):
+            key.x = 1
+        assert key == {"a": 1}
+
+    def test_copy_and_pickle(self):
+        key = FrozenDict({"a": 1, "b": [1, 2]})
+        assert copy.copy(key) is key
+        assert copy.deepcopy(key) == key
+        restored = pickle.loads(pickle.dumps(FrozenDict({"a": 1})))
+        assert isinstance(restored, FrozenDict)
+        assert restored == {"a": 1}
+        assert hash(restored) == hash(FrozenDict({"a": 1}))
+
+    def test_intern_shares_instances(self):
+        a = FrozenDict.intern({"region": "eu", "tier": 2})
+        b = FrozenDict.intern(tier=2, region="eu")
+        assert a is b
+        assert FrozenDict.from_string('{"tier": 2, "region": "eu"}') is a
+        assert FrozenDict.intern({"region": "us", "tier": 2}) != a
+
+    def test_intern_keeps_value_types_apart(self):
+        one = FrozenDict.intern({"enabled": 1})
+        nested = FrozenDict.intern({"v": (1, frozenset({1.0}))})
+        assert FrozenDict.intern({"enabled": True}) is not one
+        assert FrozenDict.intern({"enabled": True})["enabled"] is True
+        assert type(FrozenDict.intern({"enabled": 1.0})["enabled"]) is float
+        assert FrozenDict.from_string('{"a": true}')["a"] is True
+        assert FrozenDict.intern({"v": (True, frozenset({1.0}))}) is not nested
+        assert FrozenDict.intern({"v": (1, frozenset({True}))}) is not nested
+
+        loaded = DictKeysDict.loadJson('{"{\\"enabled\\": true}": "x"}')
+        (key,) = loaded.keys()
+        assert key["enabled"] is True
+        assert json.loads(DictKeysDict.dumpJson(loaded)) == {'{"enabled": true}': "x"}
+        assert one["enabled"] == 1
+
+    def test_intern_unhashable_values(self):
+        key = FrozenDict.intern({"a": [1, 2]})
+        assert not key._interned
+        assert key == {"a": [1, 2]}
+
+    def test_dictkeysdict_stores_interned_keys(self):
+        d = DictKeysDict()
+        d[FrozenDict({"a": 1})] = "x"
+        d['{"a": 1}'] = "y"
+        assert len(d) == 1
+        (stored,) = d.keys()
+        assert stored is FrozenDict.intern({"a": 1})
+
+
+class TestKeyCache:
+    def test_string_lookups_hit_cache(self):
+        DictKeysDict.key_cache_clear()
+        d = DictKeysDict()
+        d['{"region": "eu", "tier": 2}'] = 1
+        for _ in range(9):
+            assert d['{"region": "eu", "tier": 2}'] == 1
+        info = DictKeysDict.key_cache_info()
+        assert info["misses"] == 1
+        assert info["hits"] == 9
+        assert info["hit_rate"] == 0.9
+
+    def test_cache_shared_with_loadJson(self):
+        DictKeysDict.key_cache_clear()
+        DictKeysDict.loadJson('{"plain": {"plain": 1}}')
+        info = DictKeysDict.key_cache_info()
+        assert info["misses"] == 1
+        assert info["hits"] == 1
+        DictKeysDict.key_cache_clear()
+        assert DictKeysDict.key_cache_info()["hit_rate"] == 0.0
+
+
+class TestDictKeysDictIndex:
+    @pytest.fixture(params=[True, False], ids=["indexed", "scan"])
+    def table(self, request):
+        d = DictKeysDict(_indexed=request.param)
+        d[FrozenDict({"region": "eu", "tier": 1, "sku": "a"})] = 1
+        d[FrozenDict({"region": "eu", "tier": 2, "sku": "b"})] = 2
+        d[FrozenDict({"region": "us", "tier": 2, "sku": "c"})] = 3
+        return d
+
+    def test_query_single_field(self, table):
+        assert sorted(table.query(region="eu").values()) == [1, 2]
+
+    def test_query_multiple_fields(self, table):
+        assert list(table.query({"region": "eu"}, tier=2).values()) == [2]
+        assert table.query(region="eu", sku="c") == {}
+        assert table.query(region="asia") == {}
+
+    def test_index_follows_deletion(self, table):
+        del table[FrozenDict({"region": "eu", "tier": 1, "sku": "a"})]
+        assert list(table.query(region="eu").values()) == [2]
+        table.pop(FrozenDict({"region": "eu", "tier": 2, "sku": "b"}))
+        assert table.query(region="eu") == {}
+        table.clear()
+        assert table.query(tier=2) == {}
+
+    def test_index_follows_update(self, table):
+        table.update({FrozenDict({"region": "eu", "tier": 3, "sku": "d"}): 4})
+        table.setdefault(FrozenDict({"region": "eu", "tier": 4, "sku": "e"}), 5)
+        assert sorted(table.query(region="eu").values()) == [1, 2, 4, 5]
+
+    @pytest.mark.parametrize(
+        "duplicate",
+        [copy.copy, copy.deepcopy, DictKeysDict.copy, lambda d: pickle.loads(pickle.dumps(d))],
+    )
+    def test_copies_have_their_own_index(self, duplicate):
+        d = DictKeysDict(_indexed=True)
+        d[FrozenDict({"x": 1, "y": 2})] = "a"
+        d[FrozenDict({"x": 1, "y": 3})] = {"inner": 1}
+        other = duplicate(d)
+        assert type(other) is DictKeysDict and other == d
+        del other[FrozenDict({"x": 1, "y": 2})]
+        assert d.query_keys(x=1) == {FrozenDict({"x": 1, "y": 2}), FrozenDict({"x": 1, "y": 3})}
+        assert other.query_keys(x=1) == {FrozenDict({"x": 1, "y": 3})}
+        assert isinstance(other[FrozenDict({"x": 1, "y": 3})], DictKeysDict)
+
+    def test_merge_operators_convert_and_index(self):
+        d = DictKeysDict(_indexed=True)
+        d |= {'{"x": 1}': {"nested": 1}}
+        assert d.query_keys(x=1) == {FrozenDict({"x": 1})}
+        assert isinstance(d[FrozenDict({"x": 1})], DictKeysDict)
+        merged = d | {'{"x": 2}': 2}
+        assert isinstance(merged, DictKeysDict)
+        assert merged.query_keys(x=2) == {FrozenDict({"x": 2})}
+        assert d.query_keys(x=2) == set()
+
+    def test_indexed_keyword_not_stored(self):
+        d = DictKeysDict(_indexed=True)
+        assert len(d) == 0
+        assert d._index == {}
+
+
+class TestDictKeysDictJson:
+    @pytest.mark.parametrize("text, expected", [("1", 1), ("null", None), ('"s"', "s"), ("2.5", 2.5)])
+    def test_load_scalar_top_level(self, tmp_path, text, expected):
+        assert DictKeysDict.loadJson(text) == expected
+        path = tmp_path / "scalar.json"
+        path.write_text(text)
+        assert DictKeysDict.loadJsonFile(str(path)) == expected
+
+    def test_dump_load_deep_nesting(self):
+        data = {"leaf": 1}
+        for i in range(200):
+            data = {FrozenDict({"level": i}): [data]}
+        original = DictKeysDict(data)
+        loaded = DictKeysDict.loadJson(DictKeysDict.dumpJson(original))
+        assert loaded == original
+        node = loaded
+        for i in reversed(range(200)):
+            node = node[FrozenDict({"level": i})][0]
+            assert isinstance(node, DictKeysDict)
+        assert node["leaf"] == 1
+
+    def test_dump_frozendict_values(self):
+        dumped = DictKeysDict.dumpJson([FrozenDict({"b": 1}), FrozenDict("c")])
+        assert json.loads(dumped) == ['{"b": 1}', "c"]
+
+    def test_file_roundtrip(self, tmp_path):
+        original = DictKeysDict({FrozenDict({"a": 1}): [{"b": 2}, "c"], "d": None})
+        path = tmp_path / "data.json"
+        DictKeysDict.dumpJsonFile(original, str(path))
+        assert DictKeysDict.loadJsonFile(str(path)) == original
+
+    @pytest.mark.parametrize(
+        "value",
+        [float("inf"), float("-inf"), 123456789012345678901234567890, -(2**63) - 1, 2**64],
+    )
+    def test_lossless_roundtrip(self, tmp_path, value):
+        original = DictKeysDict({FrozenDict({"a": 1}): [value], "b": value})
+        assert DictKeysDict.loadJson(DictKeysDict.dumpJson(original)) == original
+        path = tmp_path / "data.json"
+        DictKeysDict.dumpJsonFile(original, str(path))
+        assert DictKeysDict.loadJsonFile(str(path)) == original
+
+    def test_nan_roundtrip(self):
+        dumped = DictKeysDict.dumpJson({"a": float("nan")})
+        assert dumped == '{"a": NaN}'
+        assert math.isnan(DictKeysDict.loadJson(dumped)["a"])
+        assert math.isnan(DictKeysDict.loadJson(dumped.encode())["a"])
+
+    def test_dump_format_does_not_depend_on_orjson(self, monkeypatch):
+        from zuu.common import dictKey
+
+        original = DictKeysDict({FrozenDict({"a": 1}): ["é", 2.5]})
+        dumped = DictKeysDict.dumpJson(original)
+        monkeypatch.setattr(dictKey, "orjson", None)
+        assert DictKeysDict.dumpJson(original) == dumped == json.dumps(
+            {'{"a": 1}': ["é", 2.5]}
+        )
+
+    def test_stdlib_fallback(self, monkeypatch):
+        from zuu.common import dictKey
+
+        monkeypatch.setattr(dictKey, "orjson", None)
+        original = DictKeysDict({FrozenDict({"a": 1}): [{"b": 2}]})
+        assert DictKeysDict.loadJson(DictKeysDict.dumpJson(original)) == original
@@ -1,8 +1,12 @@
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import tempfile
 import time
 import pytest
-from zuu.common.fileProp import FileProperty
+from zuu.common import fileProp
+from zuu.common.fileProp import ContentCache, FileProperty
+from zuu.pkg import inotify
 
 class TestFileProperty:
 
@@ -79,3 +83,288 @@ class TestFileProperty:
         new_content = fp.__get__(None, None)
         assert new_content == initial_content  # Content should be the same, but watcher always returns True
 
+
+    def test_file_property_hash_skipped_when_stat_unchanged(self, temp_file, monkeypatch):
+        calls = []
+        original = fileProp.hash_file
+        monkeypatch.setattr(
+            fileProp, "hash_file", lambda *a: calls.append(a) or original(*a)
+        )
+        fp = FileProperty(temp_file, watcher="sha256")
+        fp.__get__(None, None)
+        assert len(calls) == 1  # baseline digest on first load
+        fp.__get__(None, None)
+        fp.__get__(None, None)
+        assert len(calls) == 1
+
+    def test_file_property_touch_without_change_keeps_content(self, temp_file):
+        loads = []
+
+        def counting_load(filepath):
+            loads.append(filepath)
+            with open(filepath) as f:
+                return f.read()
+
+        fp = FileProperty(temp_file, watcher=["md5", "crc32"], loadMethod=counting_load)
+        fp.__get__(None, None)
+        st = os.stat(temp_file)
+        os.utime(temp_file, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        assert fp.__get__(None, None) == "Test content"
+        os.utime(temp_file, ns=(st.st_atime_ns, st.st_mtime_ns + 2 * 10**9))
+        assert fp.__get__(None, None) == "Test content"
+        assert len(loads) == 1
+
+        with open(temp_file, "a") as f:
+            f.write("!")
+        assert fp.__get__(None, None) == "Test content!"
+        assert len(loads) == 2
+
+    def test_file_property_stat_watcher_change_records_digests(self, temp_file):
+        loads = []
+
+        def counting_load(filepath):
+            loads.append(filepath)
+            with open(filepath) as f:
+                return f.read()
+
+        fp = FileProperty(temp_file, watcher=["size", "sha256"], loadMethod=counting_load)
+        fp.__get__(None, None)
+        with open(temp_file, "a") as f:
+            f.write("!")
+        assert fp.__get__(None, None) == "Test content!"
+        st = os.stat(temp_file)
+        os.utime(temp_file, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        fp.__get__(None, None)
+        assert len(loads) == 2
+
+    def test_file_property_unknown_watcher(self, temp_file):
+        with pytest.raises(ValueError):
+            FileProperty(temp_file, watcher="inode-magic")
+
+
+class TestContentCache:
+
+    @pytest.fixture
+    def files(self, tmp_path):
+        paths = []
+        for i in range(3):
+            path = tmp_path / f"file{i}.txt"
+            path.write_text(str(i) * 100)
+            paths.append(str(path))
+        return paths
+
+    def test_entry_budget_evicts_lru(self, files):
+        cache = ContentCache(max_entries=2)
+        props = [FileProperty(path, cache=cache) for path in files]
+        for fp in props:
+            fp.__get__(None, None)
+        assert len(cache) == 2
+        assert files[0] not in cache
+        assert cache.stats()["evictions"] == 1
+
+        # evicted content is loaded again on access
+        assert props[0].__get__(None, None) == "0" * 100
+        assert cache.stats()["loads"] == 4
+
+    def test_byte_budget(self, files):
+        cache = ContentCache(max_bytes=250)
+        for path in files:
+            FileProperty(path, cache=cache).__get__(None, None)
+        assert cache.bytes == 200
+        assert cache.stats()["evictions"] == 1
+
+    def test_hits_are_counted(self, files):
+        cache = ContentCache()
+        fp = FileProperty(files[0], cache=cache)
+        fp.__get__(None, None)
+        fp.__get__(None, None)
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["loads"] == 1
+
+    def test_configure_shared_cache(self, files):
+        previous = FileProperty._content
+        try:
+            shared = FileProperty.configure_cache(max_entries=1)
+            FileProperty(files[0]).__get__(None, None)
+            FileProperty(files[1]).__get__(None, None)
+            assert list(shared._data) == [files[1]]
+        finally:
+            FileProperty._content = previous
+
+
+class TestFilePropertyAppendOnly:
+
+    @pytest.fixture
+    def jsonl_file(self, tmp_path):
+        path = tmp_path / "events.jsonl"
+        path.write_text('{"n": 0}\n{"n": 1}\n')
+        return str(path)
+
+    def _append(self, path, text):
+        with open(path, "a") as f:
+            f.write(text)
+
+    def test_tail_is_appended_in_place(self, jsonl_file, monkeypatch):
+        fp = FileProperty(jsonl_file, appendOnly=True)
+        records = fp.__get__(None, None)
+        assert records == [{"n": 0}, {"n": 1}]
+
+        self._append(jsonl_file, '{"n": 2}\n')
+        parsed = []
+        real_loads = fileProp.json.loads
+        monkeypatch.setattr(
+            fileProp.json, "loads", lambda line: parsed.append(line) or real_loads(line)
+        )
+        updated = fp.__get__(None, None)
+        assert updated is records
+        assert updated == [{"n": 0}, {"n": 1}, {"n": 2}]
+        assert parsed == [b'{"n": 2}']
+
+    def test_partial_line_waits_for_newline(self, jsonl_file):
+        fp = FileProperty(jsonl_file, appendOnly=True)
+        fp.__get__(None, None)
+        self._append(jsonl_file, '{"n": 2')
+        assert len(fp.__get__(None, None)) == 2
+        self._append(jsonl_file, "}\n")
+        assert fp.__get__(None, None)[-1] == {"n": 2}
+
+    def test_rewritten_file_is_fully_reloaded(self, jsonl_file):
+        fp = FileProperty(jsonl_file, appendOnly=True)
+        fp.__get__(None, None)
+        with open(jsonl_file, "w") as f:
+            f.write('{"n": 9}\n{"n": 8}\n{"n": 7}\n')
+        assert fp.__get__(None, None) == [{"n": 9}, {"n": 8}, {"n": 7}]
+
+    def test_log_lines(self, tmp_path):
+        path = tmp_path / "app.log"
+        path.write_text("start\n")
+        fp = FileProperty(str(path), appendOnly=True)
+        assert fp.__get__(None, None) == ["start"]
+        self._append(str(path), "next\n")
+        assert fp.__get__(None, None) == ["start", "next"]
+
+    def test_rejects_load_method(self, jsonl_file):
+        with pytest.raises(ValueError):
+            FileProperty(jsonl_file, appendOnly=True, loadMethod=lambda p: None)
+
+
+class TestFilePropertyCallbacks:
+
+    @pytest.fixture
+    def temp_file(self, tmp_path):
+        path = tmp_path / "data.txt"
+        path.write_text("a")
+        return str(path)
+
+    def test_callbacks_only_on_change(self, temp_file):
+        seen = []
+        fp = FileProperty(temp_file, callbacks=[lambda path, content: seen.append(content)])
+        fp.__get__(None, None)
+        fp.__get__(None, None)
+        assert seen == ["a"]
+        with open(temp_file, "a") as f:
+            f.write("b")
+        fp.__get__(None, None)
+        assert seen == ["a", "ab"]
+
+    def test_callbacks_not_fired_by_eviction(self, temp_file, tmp_path):
+        seen = []
+        other = tmp_path / "other.txt"
+        other.write_text("x")
+        cache = ContentCache(max_entries=1)
+        fp = FileProperty(
+            temp_file, callbacks=[lambda path, content: seen.append(content)], cache=cache
+        )
+        neighbour = FileProperty(str(other), cache=cache)
+        for _ in range(3):
+            assert fp.__get__(None, None) == "a"
+            neighbour.__get__(None, None)
+        assert seen == ["a"]
+        assert cache.evictions >= 2
+
+    def test_callbacks_on_executor(self, temp_file):
+        threads = []
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            fp = FileProperty(
+                temp_file,
+                callbacks=[lambda path, content: threads.append(threading.get_ident())],
+                callbackExecutor=executor,
+            )
+            fp.__get__(None, None)
+        assert len(threads) == 1
+        assert threads[0] != threading.get_ident()
+
+    def test_debounce_coalesces_bursts(self, temp_file):
+        seen = []
+        done = threading.Event()
+
+        def callback(path, content):
+            seen.append(content)
+            done.set()
+
+        fp = FileProperty(temp_file, callbacks=[callback], debounce=0.2)
+        fp.__get__(None, None)
+        for char in "bcd":
+            with open(temp_file, "a") as f:
+                f.write(char)
+            fp.__get__(None, None)
+        assert seen == []
+        assert done.wait(5)
+        time.sleep(0.3)
+        assert seen == ["abcd"]
+
+
+@pytest.mark.skipif(not inotify.is_supported(), reason="inotify is Linux only")
+class TestFilePropertyNotify:
+
+    @pytest.fixture
+    def temp_file(self, tmp_path):
+        path = tmp_path / "watched.txt"
+        path.write_text("first")
+        return str(path)
+
+    def _wait_change(self, path, before):
+        watcher = inotify.InotifyWatcher()
+        deadline = time.time() + 5
+        while watcher.changes.get(path) == before and time.time() < deadline:
+            time.sleep(0.01)
+
+    def test_clean_access_skips_polling(self, temp_file, monkeypatch):
+        fp = FileProperty(temp_file, notify=True)
+        assert fp.__get__(None, None) == "first"
+
+        def fail():
+            raise AssertionError("polled although inotify is active")
+
+        monkeypatch.setattr(fp, "_contentChanged", fail)
+        assert fp.__get__(None, None) == "first"
+
+    def test_modification_is_seen(self, temp_file):
+        fp = FileProperty(temp_file, notify=True)
+        assert fp.__get__(None, None) == "first"
+        before = inotify.InotifyWatcher().changes[temp_file]
+        with open(temp_file, "w") as f:
+            f.write("second, same mtime second")
+        self._wait_change(temp_file, before)
+        assert fp.__get__(None, None) == "second, same mtime second"
+
+    def test_atomic_replace_is_seen(self, temp_file, tmp_path):
+        fp = FileProperty(temp_file, notify=True)
+        assert fp.__get__(None, None) == "first"
+        replacement = tmp_path / "replacement.txt"
+        replacement.write_text("replaced")
+        before = inotify.InotifyWatcher().changes[temp_file]
+        os.replace(replacement, temp_file)
+        self._wait_change(temp_file, before)
+        assert fp.__get__(None, None) == "replaced"
+
+    def test_instances_sharing_a_watch_each_see_changes(self, temp_file):
+        a = FileProperty(temp_file, notify=True, cache=ContentCache())
+        b = FileProperty(temp_file, notify=True, cache=ContentCache())
+        assert a.__get__(None, None) == b.__get__(None, None) == "first"
+        before = inotify.InotifyWatcher().changes[temp_file]
+        with open(temp_file, "w") as f:
+            f.write("two!")
+        self._wait_change(temp_file, before)
+        assert a.__get__(None, None) == "two!"
+        assert b.__get__(None, None) == "two!"
@@ -0,0 +1,263 @@
+import os
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import pytest
+from zuu.common import tempFile
+from zuu.common.tempFile import Workspace, WorkspacePool, stage_file, temp
+
+
+@temp(paths=["input.txt"], capture=["*.out"], workspace=True)
+def shout(suffix, workspace: Workspace):
+    with workspace.open("input.txt") as f:
+        data = f.read().upper()
+    with workspace.open(f"shout{suffix}.out", "w") as f:
+        f.write(data)
+    return os.getpid()
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "input.txt").write_text("data")
+    return tmp_path
+
+
+class TestStageFile:
+    def test_copy_is_independent(self, workdir, tmp_path_factory):
+        target = tmp_path_factory.mktemp("stage")
+        staged = stage_file("input.txt", str(target), "copy")
+        assert open(staged).read() == "data"
+        assert not os.path.samefile(staged, "input.txt")
+
+    def test_link_falls_back_to_hard_link(self, workdir, tmp_path_factory, monkeypatch):
+        monkeypatch.setattr(tempFile, "_reflink", lambda src, dst: False)
+        target = tmp_path_factory.mktemp("stage")
+        staged = stage_file("input.txt", str(target), "link")
+        assert os.path.samefile(staged, "input.txt")
+        assert not os.path.islink(staged)
+
+    def test_link_without_reflink_support_hard_links(self, workdir, tmp_path_factory):
+        fcntl = pytest.importorskip("fcntl")
+        target = tmp_path_factory.mktemp("stage")
+        with open("input.txt", "rb") as src, open(target / "probe", "wb") as dst:
+            try:
+                fcntl.ioctl(dst.fileno(), tempFile.FICLONE, src.fileno())
+                pytest.skip("filesystem supports reflinks")
+            except OSError:
+                pass
+        os.unlink(target / "probe")
+        staged = stage_file("input.txt", str(target), "link")
+        assert os.path.samefile(staged, "input.txt")
+        assert os.stat("input.txt").st_nlink == 2
+
+    def test_link_falls_back_to_symlink(self, workdir, tmp_path_factory, monkeypatch):
+        monkeypatch.setattr(tempFile, "_reflink", lambda src, dst: False)
+
+        def no_link(src, dst):
+            raise OSError("cross-device link")
+
+        monkeypatch.setattr(os, "link", no_link)
+        target = tmp_path_factory.mktemp("stage")
+        staged = stage_file("input.txt", str(target), "link")
+        assert os.path.islink(staged)
+        assert open(staged).read() == "data"
+
+    def test_reflink_is_independent(self, workdir, tmp_path_factory):
+        target = tmp_path_factory.mktemp("stage")
+        staged = stage_file("input.txt", str(target), "reflink")
+        with open(staged, "w") as f:
+            f.write("changed")
+        assert (workdir / "input.txt").read_text() == "data"
+
+    @pytest.mark.parametrize("stage", ["copy", "reflink", "link"])
+    def test_same_file_is_rejected(self, workdir, stage):
+        with pytest.raises(shutil.SameFileError):
+            stage_file("input.txt", str(workdir), stage)
+        assert (workdir / "input.txt").read_text() == "data"
+
+    @pytest.mark.parametrize("stage", ["reflink", "link"])
+    def test_replaces_other_file_without_writing_through(self, workdir, tmp_path_factory, stage):
+        target = tmp_path_factory.mktemp("stage")
+        (workdir / "other.txt").write_text("other")
+        os.link(workdir / "other.txt", target / "input.txt")
+        staged = stage_file("input.txt", str(target), stage)
+        assert open(staged).read() == "data"
+        assert (workdir / "other.txt").read_text() == "other"
+
+    def test_unknown_mode(self, workdir):
+        with pytest.raises(ValueError):
+            stage_file("input.txt", str(workdir), "teleport")
+
+
+class TestTempStaging:
+    @pytest.mark.parametrize("stage", ["copy", "reflink", "link"])
+    def test_roundtrip(self, workdir, stage):
+        @temp(paths=["*.txt"], capture=["*.out", "input.txt"], stage=stage)
+        def job():
+            with open("result.out", "w") as f:
+                f.write(open("input.txt").read().upper())
+            return os.getcwd()
+
+        temp_dir = job()
+        assert temp_dir != str(workdir)
+        assert os.getcwd() == str(workdir)
+        assert (workdir / "result.out").read_text() == "DATA"
+        assert (workdir / "input.txt").read_text() == "data"
+
+    @pytest.mark.parametrize("stage", ["copy", "reflink", "link"])
+    def test_overlapping_patterns(self, workdir, stage):
+        @temp(paths=["*.txt", "input.txt"], stage=stage)
+        def job():
+            return open("input.txt").read()
+
+        assert job() == "data"
+        assert (workdir / "input.txt").read_text() == "data"
+
+    def test_outputs_are_moved(self, workdir, monkeypatch):
+        copies = []
+        monkeypatch.setattr(tempFile.shutil, "copy2", lambda *a: copies.append(a))
+
+        @temp(capture=["*.out"], stage="reflink")
+        def job():
+            with open("result.out", "w") as f:
+                f.write("x")
+
+        job()
+        assert copies == []
+        assert (workdir / "result.out").read_text() == "x"
+
+
+class TestTempWorkspace:
+    def test_does_not_change_cwd(self, workdir, monkeypatch):
+        def no_chdir(path):
+            raise AssertionError("chdir called")
+
+        monkeypatch.setattr(os, "chdir", no_chdir)
+        assert shout("") == os.getpid()
+        assert (workdir / "shout.out").read_text() == "DATA"
+
+    def test_runs_subprocess_in_workspace(self, workdir):
+        @temp(paths=["input.txt"], workspace=True)
+        def job(workspace):
+            return workspace.run(
+                [sys.executable, "-c", "print(open('input.txt').read())"],
+                capture_output=True,
+                text=True,
+            ).stdout.strip()
+
+        assert job() == "data"
+
+    def test_concurrent_jobs(self, workdir):
+        barrier = threading.Barrier(4)
+
+        @temp(capture=["*.out"], workspace=True)
+        def job(i, workspace):
+            barrier.wait(timeout=5)
+            with workspace.open(f"{i}.out", "w") as f:
+                f.write(workspace.path)
+
+        with ThreadPoolExecutor(4) as pool:
+            list(pool.map(job, range(4)))
+        paths = {(workdir / f"{i}.out").read_text() for i in range(4)}
+        assert len(paths) == 4
+        assert os.getcwd() == str(workdir)
+
+    def test_workspace_job_beside_chcwd_job(self, workdir):
+        inside = threading.Event()
+        leave = threading.Event()
+
+        @temp()
+        def chcwd_job():
+            inside.set()
+            leave.wait(5)
+
+        @temp(paths=["input.txt"], capture=["*.out"], workspace=True)
+        def workspace_job(workspace):
+            with workspace.open("r.out", "w") as f:
+                f.write(workspace.open("input.txt").read())
+
+        first = threading.Thread(target=chcwd_job)
+        first.start()
+        assert inside.wait(5)
+        second = threading.Thread(target=workspace_job)
+        second.start()
+        time.sleep(0.1)
+        leave.set()
+        first.join(5)
+        second.join(5)
+        assert (workdir / "r.out").read_text() == "data"
+        assert os.getcwd() == str(workdir)
+
+    def test_thread_executor(self, workdir):
+        with ThreadPoolExecutor(1) as pool:
+
+            @temp(workspace=True, executor=pool)
+            def job(workspace):
+                return threading.current_thread() is threading.main_thread()
+
+            assert job() is False
+
+    @pytest.mark.skipif(sys.platform != "linux", reason="relies on fork start method")
+    def test_process_executor(self, workdir):
+        with ProcessPoolExecutor(1) as pool:
+            pid = temp(paths=["input.txt"], capture=["*.out"], workspace=True, executor=pool)(
+                shout.__wrapped__
+            )("-proc")
+        assert pid != os.getpid()
+        assert (workdir / "shout-proc.out").read_text() == "DATA"
+
+    def test_executor_requires_workspace(self):
+        with pytest.raises(ValueError):
+            temp(executor=ThreadPoolExecutor(1))
+
+
+class TestWorkspacePool:
+    def test_reuses_emptied_directories(self, tmp_path):
+        pool = WorkspacePool(size=1, shm_dir=None, disk_dir=str(tmp_path))
+        with pool.workspace() as first:
+            os.makedirs(os.path.join(first, "nested"))
+            open(os.path.join(first, "nested", "f"), "w").close()
+            open(os.path.join(first, "g"), "w").close()
+        with pool.workspace() as second:
+            assert second == first
+            assert os.listdir(second) == []
+
+    def test_extra_workspaces_are_removed(self, tmp_path):
+        pool = WorkspacePool(size=1, shm_dir=None, disk_dir=str(tmp_path))
+        a = pool.acquire()
+        b = pool.acquire()
+        pool.release(a)
+        pool.release(b)
+        assert os.path.isdir(a)
+        assert not os.path.exists(b)
+
+    def test_spills_over_budget(self, tmp_path):
+        shm = tmp_path / "shm"
+        shm.mkdir()
+        pool = WorkspacePool(size=1, max_bytes=100, shm_dir=str(shm), disk_dir=str(tmp_path))
+        small = pool.acquire(60)
+        assert small.startswith(str(shm))
+        assert pool.shm_used == 60
+        large = pool.acquire(60)
+        assert not large.startswith(str(shm))
+        assert pool.spills == 1
+        pool.release(small)
+        pool.release(large)
+        assert pool.shm_used == 0
+
+    def test_temp_with_pool(self, workdir, tmp_path_factory):
+        pool = WorkspacePool(size=1, disk_dir=str(tmp_path_factory.mktemp("pool")))
+
+        @temp(paths=["input.txt"], capture=["*.out"], workspace=True, pool=pool)
+        def job(workspace):
+            with workspace.open("result.out", "w") as f:
+                f.write(workspace.path)
+            return workspace.path
+
+        first = job()
+        assert job() == first
+        assert (workdir / "result.out").read_text() == first
+        assert os.listdir(first) == []
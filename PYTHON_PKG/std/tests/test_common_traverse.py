@@ -1,5 +1,15 @@
+import copy
 import pytest
-from zuu.common.traverse import get_deep, set_deep, del_deep, set_default_deep
+from zuu.common.traverse import (
+    get_deep,
+    set_deep,
+    del_deep,
+    set_default_deep,
+    compile_path,
+    iter_match,
+    apply_patch,
+    diff,
+)
 
 class TestDrillFunctions:
     @pytest.fixture
@@ -162,3 +172,231 @@ class TestComplexDataStructures:
             get_deep(complex_data, "settings", "theme", "animations", "duration")
             == "0.3s"
         )
+
+
+class TestCompiledPath:
+    @pytest.fixture
+    def nested(self):
+        return {"a": {"b": [{"c": 1}, {"c": 2}]}, "t": ({"x": 1}, {"x": 2})}
+
+    def test_get(self, nested):
+        assert compile_path("a.b.1.c").get(nested) == 2
+        assert compile_path("a", "b", 0, "c").get(nested) == 1
+        assert compile_path("t.1.x").get(nested) == 2
+
+    def test_get_missing(self, nested):
+        path = compile_path("a.b.5.c")
+        with pytest.raises(KeyError):
+            path.get(nested)
+        assert path.get(nested, default=None) is None
+
+    def test_get_many(self, nested):
+        records = [{"id": {"v": i}} for i in range(3)] + [{}]
+        assert compile_path("id.v").get_many(records, default=-1) == [0, 1, 2, -1]
+        with pytest.raises(KeyError):
+            compile_path("id.v").get_many(records)
+
+    def test_set_and_delete(self, nested):
+        path = compile_path("a.b.0.d.e")
+        path.set(nested, 5)
+        assert nested["a"]["b"][0]["d"]["e"] == 5
+        path.delete(nested)
+        assert nested["a"]["b"][0]["d"] == {}
+
+    def test_set_pads_list_with_fresh_dicts(self):
+        data = {"x": []}
+        compile_path("x.2.y").set(data, 1)
+        assert data["x"] == [{}, {}, {"y": 1}]
+        assert data["x"][0] is not data["x"][1]
+
+    def test_attribute_and_set_steps(self):
+        class Node:
+            child = {"k": "v"}
+
+        assert compile_path("n.child.k").get({"n": Node()}) == "v"
+        assert compile_path("s.0").get({"s": {"only"}}) == "only"
+
+    def test_compile_is_cached(self):
+        assert compile_path("a.b") is compile_path("a.b")
+
+
+class TestIterMatch:
+    @pytest.fixture
+    def doc(self):
+        return {
+            "id": 0,
+            "services": {
+                "api": {"id": 1, "limits": {"cpu": 2}},
+                "db": {"id": 2, "limits": {"cpu": 4}, "replicas": [{"id": 3}]},
+            },
+        }
+
+    def test_single_wildcard(self, doc):
+        assert list(iter_match(doc, "services.*.limits.cpu")) == [
+            (("services", "api", "limits", "cpu"), 2),
+            (("services", "db", "limits", "cpu"), 4),
+        ]
+
+    def test_recursive_descent(self, doc):
+        assert [v for _, v in iter_match(doc, "**.id")] == [0, 1, 2, 3]
+        assert list(iter_match(doc, "services.**.replicas.*.id")) == [
+            (("services", "db", "replicas", 0, "id"), 3)
+        ]
+
+    def test_limit_and_laziness(self, doc):
+        assert [v for _, v in iter_match(doc, "**.id", limit=2)] == [0, 1]
+        gen = iter_match(doc, "**.cpu")
+        assert next(gen)[1] == 2
+
+    def test_exact_list_index_and_no_match(self, doc):
+        assert list(iter_match(doc, ["services", "db", "replicas", 0, "id"])) == [
+            (("services", "db", "replicas", 0, "id"), 3)
+        ]
+        assert list(iter_match(doc, "services.*.missing")) == []
+
+    def test_multiple_recursive_segments_no_duplicates(self):
+        doc = {"a": {"a": {"b": 1}}}
+        assert list(iter_match(doc, "**.a.**.b")) == [(("a", "a", "b"), 1)]
+
+
+class TestApplyPatch:
+    @pytest.fixture
+    def doc(self):
+        return {"a": {"b": {"c": 1, "d": 2}, "l": [1, 2, 3]}, "x": 0}
+
+    def test_mixed_operations(self, doc):
+        apply_patch(
+            doc,
+            [
+                ("set", "a.b.c", 10),
+                ("delete", "a.b.d"),
+                ("setdefault", "a.b.e", 5),
+                ("setdefault", "x", 99),
+                ("set", ("a", "l", 1), 20),
+                ("set", "n.m", "new"),
+            ],
+        )
+        assert doc == {
+            "a": {"b": {"c": 10, "e": 5}, "l": [1, 20, 3]},
+            "x": 0,
+            "n": {"m": "new"},
+        }
+
+    def test_same_path_in_order(self, doc):
+        apply_patch(doc, [("set", "a.b.z", 1), ("delete", "a.b.z"), ("set", "a.b.z", 2)])
+        assert doc["a"]["b"]["z"] == 2
+
+    def test_validation_happens_before_mutation(self, doc):
+        with pytest.raises(KeyError):
+            apply_patch(doc, [("set", "a.b.c", 10), ("delete", "a.b.missing")])
+        assert doc["a"]["b"]["c"] == 1
+
+        with pytest.raises(KeyError):
+            apply_patch(doc, [("set", "x", 1), ("delete", "nope.deeper")])
+        assert doc["x"] == 0
+
+    @pytest.mark.parametrize(
+        "op, error",
+        [
+            (("set", "a.l.x", 1), ValueError),
+            (("setdefault", "a.l.9", 1), IndexError),
+            (("set", "a.l.-9", 1), IndexError),
+            (("set", "x.c", 2), AttributeError),
+            (("set", "x.c.d", 2), KeyError),
+            (("set", "a.l.0.c", 2), AttributeError),
+            (("set", "a.t.0", 1), AttributeError),
+            (("set", "a.s.k", 1), AttributeError),
+            (("setdefault", "a.s.k", 1), IndexError),
+            (("set", "a.none.k", 1), KeyError),
+            (("set", "a.l.q.k", 1), ValueError),
+        ],
+    )
+    def test_failures_leave_document_unchanged(self, op, error):
+        doc = {"a": {"b": {"c": 1}, "l": [1, 2, 3], "t": (1,), "s": {1}, "none": None}, "x": 0}
+        before = copy.deepcopy(doc)
+        with pytest.raises(error):
+            # root operations run first, so a late failure would follow real mutations
+            apply_patch(
+                doc, [("set", "zz", 1), ("set", "a.b.c", 10), ("set", "a.b.new", 1), op]
+            )
+        assert doc == before
+
+    def test_dry_run_matches_apply(self, doc):
+        # the check must not reject what the apply pass accepts
+        apply_patch(
+            doc,
+            [
+                ("set", "a.l.5", 6),
+                ("setdefault", "a.l.4", 5),
+                ("set", "a.l.7.k", 1),
+                ("setdefault", "a.l.0", 0),
+                ("delete", "a.l.1"),
+            ],
+        )
+        assert doc["a"]["l"] == [0, 3, None, 5, 6, {}, {}, {"k": 1}]
+
+    def test_invalid_batches(self, doc):
+        with pytest.raises(ValueError):
+            apply_patch(doc, [("replace", "a", 1)])
+        with pytest.raises(ValueError):
+            apply_patch(doc, [("set", "a.b", {}), ("set", "a.b.c", 1)])
+        with pytest.raises(ValueError):
+            apply_patch(doc, [("delete", "a", 1)])
+
+
+class TestDiff:
+    @pytest.fixture
+    def pair(self):
+        old = {
+            "name": "a",
+            "tags": ["x", "y", "z"],
+            "meta": {"v": 1, "drop": True, "deep": {"k": [1, {"m": 2}]}},
+            "shape": [1, 2],
+        }
+        new = {
+            "name": "b",
+            "tags": ["x", "w"],
+            "meta": {"v": 1, "deep": {"k": [1, {"m": 3}, 4]}, "add": None},
+            "shape": {"kind": "dict"},
+        }
+        return old, new
+
+    def test_equal_objects(self, pair):
+        old, _ = pair
+        assert diff(old, old) == []
+        assert diff(old, copy.deepcopy(old)) == []
+
+    def test_apply_patch_roundtrip(self, pair):
+        old, new = pair
+        ops = diff(old, new)
+        apply_patch(old, ops)
+        assert old == new
+
+    def test_sequential_deep_functions_roundtrip(self, pair):
+        old, new = pair
+        for op in diff(old, new):
+            if op[0] == "set":
+                set_deep(old, *op[1], value=op[2])
+            else:
+                del_deep(old, *op[1])
+        assert old == new
+
+    def test_minimal_operations(self, pair):
+        old, new = pair
+        ops = diff(old, new)
+        assert ("set", ("name",), "b") in ops
+        assert ("set", ("meta", "deep", "k", 1, "m"), 3) in ops
+        assert ("delete", ("meta", "drop")) in ops
+        assert ("set", ("shape",), {"kind": "dict"}) in ops
+        assert not any(op[1][:1] == ("meta",) and op[1][-1] == "v" for op in ops)
+
+    def test_list_roots_and_invalid_roots(self):
+        assert diff([1, 2, 3], [1, 5]) == [("delete", (2,)), ("set", (1,), 5)]
+        with pytest.raises(ValueError):
+            diff({"a": 1}, [1])
+
+    @pytest.mark.parametrize("old, new", [(1, True), (1, 1.0), (0, False), (1.0, True)])
+    def test_type_changes_are_changes(self, old, new):
+        assert diff({"a": old}, {"a": new}) == [("set", ("a",), new)]
+        assert diff({"a": [{"b": old}]}, {"a": [{"b": new}]}) == [("set", ("a", 0, "b"), new)]
+        assert diff([old], [new]) == [("set", (0,), new)]
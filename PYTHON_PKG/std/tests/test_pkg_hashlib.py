@@ -0,0 +1,206 @@
+import hashlib
+import shutil
+import zlib
+import pytest
+import zuu.pkg.hashlib as zhashlib
+from zuu.pkg.hashlib import (
+    DigestCache,
+    MultiHasher,
+    hash_bytes,
+    hash_file,
+    hash_many,
+    hash_tree,
+    merkle_snapshot,
+    MerkleSnapshot,
+    sha256,
+)
+
+
+class TestMultiHasher:
+    def test_matches_hashlib_in_one_pass(self, tmp_path):
+        data = bytes(range(256)) * 5000
+        path = tmp_path / "blob.bin"
+        path.write_bytes(data)
+        digests = hash_file(str(path), ["sha256", "md5", "crc32"], chunk_size=4096)
+        assert digests == {
+            "sha256": hashlib.sha256(data).hexdigest(),
+            "md5": hashlib.md5(data).hexdigest(),
+            "crc32": format(zlib.crc32(data), "08x"),
+        }
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64])
+    def test_newline_normalization_across_chunks(self, tmp_path, chunk_size):
+        path = tmp_path / "text.txt"
+        path.write_bytes(b"a\r\nb\r\r\nc\rd\r\n\r\n\r")
+        expected = hashlib.sha256(b"a\nb\r\nc\rd\n\n\r").hexdigest()
+        assert (
+            hash_file(str(path), normalize_newlines=True, chunk_size=chunk_size)["sha256"]
+            == expected
+        )
+
+    def test_incremental_updates(self):
+        hasher = MultiHasher(["sha1", "adler32"], normalize_newlines=True)
+        for part in (b"x\r", b"\ny", memoryview(b"\r\nz")):
+            hasher.update(part)
+        digests = hasher.hexdigests()
+        assert digests["sha1"] == hashlib.sha1(b"x\ny\nz").hexdigest()
+        assert digests["adler32"] == format(zlib.adler32(b"x\ny\nz"), "08x")
+
+    def test_requires_algorithm(self):
+        with pytest.raises(ValueError):
+            MultiHasher([])
+
+
+class TestSha256:
+    def test_string(self):
+        assert sha256("not a path") == hashlib.sha256(b"not a path").hexdigest()
+        assert hash_bytes("abc")["sha256"] == hashlib.sha256(b"abc").hexdigest()
+
+    def test_file_crlf_matches_lf(self, tmp_path):
+        crlf = tmp_path / "crlf.txt"
+        lf = tmp_path / "lf.txt"
+        crlf.write_bytes(b"line1\r\nline2\r\n")
+        lf.write_bytes(b"line1\nline2\n")
+        assert sha256(str(crlf)) == sha256(str(lf))
+
+
+class TestHashMany:
+    @pytest.fixture
+    def tree(self, tmp_path):
+        root = tmp_path / "tree"
+        (root / "sub").mkdir(parents=True)
+        (root / "a.txt").write_bytes(b"alpha")
+        (root / "sub" / "b.txt").write_bytes(b"beta")
+        return root
+
+    @pytest.fixture
+    def counted(self, monkeypatch):
+        calls = []
+        original = zhashlib.hash_file
+
+        def counting(path, *args, **kwargs):
+            calls.append(path)
+            return original(path, *args, **kwargs)
+
+        monkeypatch.setattr(zhashlib, "hash_file", counting)
+        return calls
+
+    def test_hash_tree_relative_paths(self, tree):
+        assert hash_tree(str(tree), ["sha256", "crc32"]) == {
+            "a.txt": {
+                "sha256": hashlib.sha256(b"alpha").hexdigest(),
+                "crc32": format(zlib.crc32(b"alpha"), "08x"),
+            },
+            "sub/b.txt": {
+                "sha256": hashlib.sha256(b"beta").hexdigest(),
+                "crc32": format(zlib.crc32(b"beta"), "08x"),
+            },
+        }
+
+    def test_persistent_cache_skips_unchanged(self, tree, tmp_path, counted):
+        cache_file = str(tmp_path / "digests.json")
+        first = hash_tree(str(tree), cache=cache_file)
+        assert len(counted) == 2
+
+        counted.clear()
+        assert hash_tree(str(tree), cache=cache_file) == first
+        assert counted == []
+
+        (tree / "a.txt").write_bytes(b"changed!")
+        second = hash_tree(str(tree), cache=cache_file)
+        assert counted == [str(tree / "a.txt")]
+        assert second["a.txt"]["sha256"] == hashlib.sha256(b"changed!").hexdigest()
+
+    def test_cache_separates_algorithms_and_normalization(self, tree, counted):
+        cache = DigestCache()
+        path = str(tree / "a.txt")
+        hash_many([path], ["sha256"], cache=cache)
+        hash_many([path], ["sha256"], normalize_newlines=True, cache=cache)
+        hash_many([path], ["md5"], cache=cache)
+        assert len(counted) == 3
+        counted.clear()
+        digests = hash_many([path], ["md5"], cache=cache)[path]
+        assert digests["md5"] == hashlib.md5(b"alpha").hexdigest()
+        assert counted == []
+
+    def test_prunes_removed_files(self, tree, tmp_path):
+        cache = DigestCache(str(tmp_path / "digests.json"))
+        hash_tree(str(tree), cache=cache)
+        (tree / "sub" / "b.txt").unlink()
+        hash_tree(str(tree), cache=cache)
+        assert list(DigestCache(cache.path).entries) == [str(tree / "a.txt")]
+
+    def test_broken_cache_file_is_ignored(self, tree, tmp_path):
+        cache_file = tmp_path / "digests.json"
+        cache_file.write_text("{not json")
+        assert "a.txt" in hash_tree(str(tree), cache=str(cache_file))
+
+
+class TestMerkleSnapshot:
+    @pytest.fixture
+    def tree(self, tmp_path):
+        root = tmp_path / "tree"
+        (root / "sub" / "deep").mkdir(parents=True)
+        (root / "other").mkdir()
+        (root / "a.txt").write_bytes(b"alpha")
+        (root / "sub" / "b.txt").write_bytes(b"beta")
+        (root / "sub" / "deep" / "c.txt").write_bytes(b"gamma")
+        (root / "other" / "d.txt").write_bytes(b"delta")
+        return root
+
+    def test_same_content_same_digest(self, tree, tmp_path):
+        copy = tmp_path / "copy"
+        shutil.copytree(tree, copy)
+        first = merkle_snapshot(str(tree))
+        assert first == merkle_snapshot(str(copy))
+        assert first.digests["sub/deep/c.txt"] == hashlib.sha256(b"gamma").hexdigest()
+        assert first.dirs["sub"] == ["b.txt", "deep"]
+
+    def test_diff_reports_changed_paths(self, tree):
+        before = merkle_snapshot(str(tree))
+        (tree / "sub" / "deep" / "c.txt").write_bytes(b"GAMMA")
+        (tree / "a.txt").unlink()
+        (tree / "other" / "e.txt").write_bytes(b"epsilon")
+        after = merkle_snapshot(str(tree))
+        assert before != after
+        assert before.diff(after) == {
+            "added": ["other/e.txt"],
+            "removed": ["a.txt"],
+            "changed": ["", "other", "sub", "sub/deep", "sub/deep/c.txt"],
+        }
+        assert after.diff(after) == {"added": [], "removed": [], "changed": []}
+
+    def test_diff_file_replaced_by_directory(self, tree):
+        before = merkle_snapshot(str(tree))
+        (tree / "a.txt").unlink()
+        (tree / "a.txt").mkdir()
+        diff = before.diff(merkle_snapshot(str(tree)))
+        assert diff["added"] == ["a.txt"] and diff["removed"] == ["a.txt"]
+
+    def test_recheck_reads_only_changed_files(self, tree, tmp_path, monkeypatch):
+        cache_file = str(tmp_path / "digests.json")
+        before = merkle_snapshot(str(tree), cache=cache_file)
+        (tree / "other" / "d.txt").write_bytes(b"DELTA")
+
+        calls = []
+        original = zhashlib.hash_file
+        monkeypatch.setattr(
+            zhashlib, "hash_file", lambda path, *a: calls.append(path) or original(path, *a)
+        )
+        after = merkle_snapshot(str(tree), cache=cache_file)
+        assert calls == [str(tree / "other" / "d.txt")]
+        assert before.diff(after)["changed"] == ["", "other", "other/d.txt"]
+
+    def test_save_and_load(self, tree, tmp_path):
+        snapshot = merkle_snapshot(str(tree), "md5")
+        snapshot.save(str(tmp_path / "snap.json"))
+        loaded = MerkleSnapshot.load(str(tmp_path / "snap.json"))
+        assert loaded == snapshot
+        assert loaded.digests == snapshot.digests
+
+    @pytest.mark.parametrize("build", [merkle_snapshot, hash_tree])
+    def test_missing_or_file_root_raises(self, tree, build):
+        with pytest.raises(FileNotFoundError):
+            build(str(tree / "nope"))
+        with pytest.raises(NotADirectoryError):
+            build(str(tree / "a.txt"))
@@ -1,6 +1,7 @@
 import os
+import threading
 import pytest
-from zuu.pkg.os import preserve_cwd
+from zuu.pkg.os import CWD_LOCK, preserve_cwd
 
 class TestPreserveCwd:
     def test_preserve_cwd_changes_directory(self, tmp_path):
@@ -63,3 +64,19 @@ class TestPreserveCwd:
 
         result = function_with_args(1, 2, kwarg1="test")
         assert result == (1, 2, "test")
+
+
+class TestCwdLock:
+    def test_preserve_cwd_holds_lock(self):
+        acquired = []
+
+        @preserve_cwd
+        def check():
+            thread = threading.Thread(
+                target=lambda: acquired.append(CWD_LOCK.acquire(blocking=False))
+            )
+            thread.start()
+            thread.join()
+
+        check()
+        assert acquired == [False]
@@ -0,0 +1,83 @@
+import asyncio
+import subprocess
+import sys
+import time
+import pytest
+from zuu.pkg.subprocess import (
+    aquery_as_completed,
+    aquery_json,
+    aquery_many,
+    aquery_string,
+    query_many,
+)
+
+
+def py(code):
+    return [sys.executable, "-c", code]
+
+
+def sleeper(seconds, text):
+    return py(f"import time; time.sleep({seconds}); print({text!r})")
+
+
+class TestAsyncQuery:
+    def test_string_and_json(self):
+        assert asyncio.run(aquery_string(*py("print('hi')"), strip=True)) == "hi"
+        assert asyncio.run(aquery_json(*py("print('[1, 2]')"))) == [1, 2]
+
+    def test_timeout_kills_process(self):
+        with pytest.raises(subprocess.TimeoutExpired):
+            asyncio.run(aquery_string(*sleeper(10, "late"), timeout=0.2))
+
+
+class TestQueryMany:
+    def test_ordered_results_run_concurrently(self):
+        commands = [sleeper(0.3, str(i)) for i in range(6)]
+        start = time.monotonic()
+        results = query_many(commands, max_concurrency=6, output="string")
+        assert [r.strip() for r in results] == [str(i) for i in range(6)]
+        assert time.monotonic() - start < 1.2
+
+    def test_max_concurrency(self):
+        commands = [sleeper(0.2, str(i)) for i in range(4)]
+        start = time.monotonic()
+        query_many(commands, max_concurrency=2)
+        assert time.monotonic() - start >= 0.4
+
+    def test_as_completed(self):
+        commands = [sleeper(0.6, "slow"), sleeper(0.05, "fast")]
+        pairs = query_many(commands, output="string", ordered=False)
+        assert [(i, r.strip()) for i, r in pairs] == [(1, "fast"), (0, "slow")]
+
+    def test_return_exceptions(self):
+        results = query_many(
+            [py("print('not json')"), py("print(1)")], output="json", return_exceptions=True
+        )
+        assert isinstance(results[0], ValueError)
+        assert results[1] == 1
+
+    def test_failure_cancels_the_rest(self):
+        async def main():
+            with pytest.raises(subprocess.TimeoutExpired):
+                await aquery_many(
+                    [sleeper(0.05, "x"), sleeper(10, "y"), sleeper(10, "z")],
+                    timeout=0.3,
+                    max_concurrency=3,
+                )
+            return [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+
+        start = time.monotonic()
+        assert asyncio.run(main()) == []
+        assert time.monotonic() - start < 3
+
+    def test_break_cancels_pending(self):
+        async def main():
+            async for index, _ in aquery_as_completed(
+                [sleeper(0.05, "a"), sleeper(10, "b")], max_concurrency=2
+            ):
+                break
+            return index
+
+        start = time.monotonic()
+        assert asyncio.run(main()) == 0
+        assert time.monotonic() - start < 3
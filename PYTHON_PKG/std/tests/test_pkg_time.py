@@ -1,6 +1,17 @@
+import datetime
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 import pytest
-from zuu.pkg.time import remaining_time
+from zuu.pkg.time import (
+    invalidate_property,
+    remaining_time,
+    timely_cls_property,
+    timely_property,
+    ttl_cache,
+    CronSpec,
+    Scheduler,
+)
 
 class TestRemainingTime:
     def test_remaining_time_am_pm(self):
@@ -33,3 +44,255 @@ class TestRemainingTime:
     def test_remaining_time_invalid_format(self):
         with pytest.raises(ValueError):
             remaining_time("invalid")
+
+
+class Counter:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def func(self):
+        def value(_):
+            with self.lock:
+                self.calls += 1
+                n = self.calls
+            time.sleep(self.delay)
+            return n
+
+        return value
+
+
+class TestTimelyProperty:
+    def test_caches_until_expiry(self):
+        counter = Counter()
+
+        class Obj:
+            value = timely_property(0.05)(counter.func())
+
+        obj = Obj()
+        assert obj.value == 1
+        assert obj.value == 1
+        time.sleep(0.06)
+        assert obj.value == 2
+        with pytest.raises(AttributeError):
+            obj.value = 3
+
+    def test_single_flight(self):
+        counter = Counter(delay=0.1)
+
+        class Obj:
+            value = timely_property(60)(counter.func())
+
+        obj = Obj()
+        with ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(lambda _: obj.value, range(8)))
+        assert results == [1] * 8
+        assert counter.calls == 1
+
+    def test_stale_while_revalidate(self):
+        counter = Counter(delay=0.1)
+
+        class Obj:
+            value = timely_property(0.2, stale_while_revalidate=60)(counter.func())
+
+        obj = Obj()
+        assert obj.value == 1
+        time.sleep(0.25)
+        start = time.monotonic()
+        assert obj.value == 1
+        assert time.monotonic() - start < 0.05
+        time.sleep(0.15)
+        assert obj.value == 2
+        assert counter.calls == 2
+
+    def test_invalidate(self):
+        counter = Counter()
+
+        class Obj:
+            value = timely_property(60)(counter.func())
+
+        obj, other = Obj(), Obj()
+        assert obj.value == 1 and other.value == 2
+        Obj.value.invalidate(obj)
+        assert obj.value == 3 and other.value == 2
+        invalidate_property(other, "value")
+        assert other.value == 4
+
+
+class TestTimelyClsProperty:
+    def test_per_class_cache_and_invalidate(self):
+        counter = Counter()
+
+        class Base:
+            value = timely_cls_property(60)(counter.func())
+
+        class Child(Base):
+            pass
+
+        assert Base.value == 1 and Base.value == 1
+        assert Child.value == 2
+        invalidate_property(Base, "value")
+        assert Base.value == 3 and Child.value == 2
+        Base.__dict__["value"].invalidate()
+        assert Child.value == 4
+
+
+class TestTtlCache:
+    def test_hits_and_expiry(self):
+        calls = []
+
+        @ttl_cache(maxsize=8, ttl=0.05)
+        def square(x):
+            calls.append(x)
+            return x * x
+
+        assert square(3) == 9 and square(3) == 9
+        assert calls == [3]
+        time.sleep(0.06)
+        assert square(3) == 9
+        assert calls == [3, 3]
+        info = square.cache_info()
+        assert (info.hits, info.misses, info.expirations) == (1, 2, 1)
+
+    def test_lru_eviction(self):
+        @ttl_cache(maxsize=2, ttl=None)
+        def ident(x):
+            return x
+
+        ident(1), ident(2), ident(1), ident(3)
+        info = ident.cache_info()
+        assert info.evictions == 1 and info.currsize == 2
+        ident(1)
+        assert ident.cache_info().hits == 2
+        ident(2)
+        assert ident.cache_info().misses == 4
+
+    def test_byte_bound(self):
+        @ttl_cache(maxsize=None, maxbytes=250, sizeof=len)
+        def blob(n):
+            return b"x" * n
+
+        blob(100), blob(101)
+        assert blob.cache_info().currbytes == 201
+        blob(102)
+        info = blob.cache_info()
+        assert info.currsize == 2 and info.currbytes == 203 and info.evictions == 1
+        blob(1000)
+        assert blob.cache_info().currsize == 2
+
+    def test_typed_and_kwargs(self):
+        calls = []
+
+        @ttl_cache(typed=True)
+        def f(x, y=0):
+            calls.append((x, y))
+            return x
+
+        f(1), f(1.0), f(1, y=2), f(1, y=2)
+        assert calls == [(1, 0), (1.0, 0), (1, 2)]
+
+    def test_clear_and_bare_decorator(self):
+        @ttl_cache
+        def f(x):
+            return x
+
+        f(1), f(1)
+        assert f.cache_info().hits == 1
+        f.cache_clear()
+        assert f.cache_info() == (0, 0, 0, 0, 128, 0, 0)
+        assert f.cache_parameters()["ttl"] == 600
+
+    def test_thread_safety(self):
+        @ttl_cache(maxsize=16)
+        def f(x):
+            return x
+
+        with ThreadPoolExecutor(8) as pool:
+            assert list(pool.map(lambda i: f(i % 32), range(2000))) == [i % 32 for i in range(2000)]
+        info = f.cache_info()
+        assert info.hits + info.misses == 2000
+        assert info.currsize <= 16
+
+
+class TestCronSpec:
+    def test_next_after(self):
+        start = datetime.datetime(2024, 1, 1, 10, 7, 30)
+        assert CronSpec("*/15 * * * *").next_after(start) == datetime.datetime(2024, 1, 1, 10, 15)
+        assert CronSpec("0 9 * * *").next_after(start) == datetime.datetime(2024, 1, 2, 9, 0)
+        assert CronSpec("30 2 1 3 *").next_after(start) == datetime.datetime(2024, 3, 1, 2, 30)
+        # 2024-01-07 is a Sunday
+        assert CronSpec("0 0 * * 7").next_after(start) == datetime.datetime(2024, 1, 7)
+        assert CronSpec("0 0 * * 1-5").next_after(start) == datetime.datetime(2024, 1, 2)
+        assert CronSpec("0 0 29 2 *").next_after(start) == datetime.datetime(2024, 2, 29)
+
+    def test_day_fields_are_ored(self):
+        spec = CronSpec("0 0 15 * 0")
+        assert spec.next_after(datetime.datetime(2024, 1, 1)) == datetime.datetime(2024, 1, 7)
+        assert spec.next_after(datetime.datetime(2024, 1, 14, 1)) == datetime.datetime(2024, 1, 15)
+
+    @pytest.mark.parametrize("expr", ["* * * *", "60 * * * *", "*/0 * * * *", "0 0 31 2 *"])
+    def test_invalid(self, expr):
+        with pytest.raises(ValueError):
+            CronSpec(expr).next_after(datetime.datetime(2024, 1, 1))
+
+
+class TestScheduler:
+    def test_one_shot_jobs_run_in_order(self):
+        done = []
+        event = threading.Event()
+        with Scheduler(max_workers=1) as scheduler:
+            for i in (3, 1, 2):
+                scheduler.at(0, lambda i=i: done.append(i))
+                time.sleep(0.01)
+            scheduler.at(0, event.set)
+            assert event.wait(2)
+        assert done == [3, 1, 2]
+
+    def test_every_and_cancel(self):
+        ticks = []
+        with Scheduler() as scheduler:
+            job = scheduler.every(0.02, ticks.append, 1)
+            time.sleep(0.15)
+            scheduler.cancel(job)
+            count = len(ticks)
+            time.sleep(0.06)
+            assert len(ticks) == count
+            assert 4 <= count <= 8
+            assert len(scheduler) == 0
+            stats = scheduler.stats()
+        assert stats["dispatched"] == count
+        assert stats["max_lateness"] < 0.05
+
+    def test_overlapping_runs_are_skipped(self):
+        with Scheduler(max_workers=2) as scheduler:
+            job = scheduler.every(0.01, time.sleep, 0.1)
+            time.sleep(0.15)
+            job.cancel()
+        assert job.skipped > 0
+        assert job.runs <= 2
+
+    def test_many_jobs_one_thread(self):
+        counter = []
+        threads = threading.active_count()
+        with Scheduler(max_workers=4) as scheduler:
+            for _ in range(2000):
+                scheduler.at(0, counter.append, 1)
+            assert threading.active_count() <= threads + 5
+            deadline = time.monotonic() + 5
+            while len(counter) < 2000 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        assert len(counter) == 2000
+
+    def test_errors_are_recorded(self):
+        with Scheduler() as scheduler:
+            job = scheduler.at(0, lambda: 1 / 0)
+            deadline = time.monotonic() + 2
+            while not job.errors and time.monotonic() < deadline:
+                time.sleep(0.01)
+        assert isinstance(job.last_error, ZeroDivisionError)
+
+    def test_rejects_invalid_interval(self):
+        with Scheduler() as scheduler:
+            with pytest.raises(ValueError):
+                scheduler.every(0, print)